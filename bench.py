@@ -0,0 +1,142 @@
+# bench.py — offline benchmarks over the saved pages in fixtures/ (expected statuses in fixtures/manifest.json).
+"""
+    python bench.py pipeline [--rounds 10] [--warmup 1] [--browser-only] [--concurrency 4]
+        Serves fixtures/ from a local HTTP server and runs monitor.run_cycle (HTTP fast path, browser,
+        banners/"show more", classification) over every page, like a daemon cycle. Reports latency
+        percentiles per checked URL and classification accuracy; exits 1 on any mismatch.
+
+    python bench.py micro [--iterations 20]
+        Loads each page with page.set_content and compares the two ways of deciding dates:
+          - in-page:  monitor._evaluate_dates (one page.evaluate for all dates)
+          - locators: monitor._find_date_region + monitor._status_from_region per date
+        counting Playwright round-trips (driver messages) and ms per decision.
+"""
+import argparse, asyncio, json, math, threading, time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from playwright.async_api import async_playwright
+
+import monitor
+
+FIXTURES = Path(__file__).resolve().with_name("fixtures")
+
+def _manifest(fixtures: Path) -> dict:
+    return json.loads((fixtures / "manifest.json").read_text(encoding="utf-8"))
+
+def _percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+# -------- Micro: in-page evaluation vs locators --------
+async def _in_page(page, dates) -> dict:
+    return {d: r["status"] for d, r in (await monitor._evaluate_dates(page, dates)).items()}
+
+PATHS = {"in-page": _in_page, "locators": monitor._decide_with_locators}
+
+async def _measure(fn, page, dates, iterations: int):
+    """Return (last result, round-trips per run, ms per run)."""
+    result = await fn(page, dates)   # warm-up
+    calls = [0]
+    monitor._PW_CALLS.set(calls)
+    t = time.perf_counter()
+    for _ in range(iterations):
+        result = await fn(page, dates)
+    monitor._PW_CALLS.set(None)
+    return result, calls[0] / iterations, (time.perf_counter() - t) * 1000 / iterations
+
+async def micro(fixtures: Path, iterations: int) -> int:
+    wrong = 0
+    print(f"{'fixture':<22} {'path':<9} {'round-trips':>11} {'ms/run':>8}  result")
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        for name, expected in _manifest(fixtures).items():
+            await page.set_content((fixtures / name).read_text(encoding="utf-8"))
+            await monitor._accept_banners_and_expand(page, time.monotonic() + monitor.CHECK_BUDGET)
+            dates = list(expected)
+            for label, fn in PATHS.items():
+                result, trips, ms = await _measure(fn, page, dates, iterations)
+                misses = [d for d in dates if result.get(d) != expected[d]]
+                wrong += len(misses)
+                verdict = "ok" if not misses else "MISMATCH " + ", ".join(f"{d}={result.get(d)!r}" for d in misses)
+                print(f"{name:<22} {label:<9} {trips:>11.1f} {ms:>8.2f}  {verdict}")
+        await browser.close()
+    return wrong
+
+# -------- Pipeline: run_cycle against a local server --------
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def _serve(fixtures: Path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(fixtures)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+async def pipeline(fixtures: Path, rounds: int, warmup: int, browser_only: bool, concurrency: int) -> int:
+    manifest = _manifest(fixtures)
+    server, base = _serve(fixtures)
+    targets = {base + name: list(expected) for name, expected in manifest.items()}
+    monitor.LOG_TIMINGS, monitor.LOG_FORMAT = False, "text"
+    session = monitor.BrowserSession()
+    fetcher = None if browser_only else monitor.HttpFetcher()
+    latencies, checks, correct, misses = [], 0, 0, {}
+    t = time.perf_counter()
+    try:
+        for r in range(warmup + rounds):
+            results = await monitor.run_cycle(session, targets, concurrency, fetcher)
+            if r < warmup:
+                continue
+            per_url = {}
+            for (url, d), (status, ms) in results.items():
+                per_url[url] = ms
+                expected = manifest[url[len(base):]][d]
+                checks += 1
+                if status == expected:
+                    correct += 1
+                else:
+                    misses[(url[len(base):], d)] = (expected, status)
+            latencies.extend(per_url.values())
+    finally:
+        if fetcher:
+            await fetcher.aclose()
+        await session.close()
+        server.shutdown()
+    elapsed = time.perf_counter() - t
+
+    print(f"pages={len(targets)} rounds={rounds} (+{warmup} warm-up) "
+          f"fast-path={'off' if browser_only else 'on'} concurrency={concurrency} wall={elapsed:.1f}s")
+    if latencies:
+        print("latency per URL (ms): " + " ".join(f"p{p}={_percentile(latencies, p)}" for p in (50, 90, 99)) +
+              f" max={max(latencies)}")
+    peak = monitor.METRICS.peak_rss_mb
+    print(f"accuracy: {correct}/{checks} ({100 * correct / max(checks, 1):.1f}%)  peak rss={peak:.0f}MB")
+    for (name, d), (expected, got) in sorted(misses.items()):
+        print(f"  MISMATCH {name} {d}: expected {expected!r}, got {got!r}")
+    return len(misses)
+
+# -------- Main --------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline benchmarks over saved event pages.")
+    ap.add_argument("--fixtures", type=Path, default=FIXTURES)
+    sub = ap.add_subparsers(dest="mode", required=True)
+    p = sub.add_parser("pipeline", help="run_cycle against a local server: latency percentiles + accuracy")
+    p.add_argument("--rounds", type=int, default=10)
+    p.add_argument("--warmup", type=int, default=1, help="rounds excluded from the stats (browser launch)")
+    p.add_argument("--browser-only", action="store_true", help="skip the HTTP fast path")
+    p.add_argument("--concurrency", type=int, default=monitor.CONCURRENCY)
+    m = sub.add_parser("micro", help="in-page evaluation vs locator path: round-trips + ms per decision")
+    m.add_argument("--iterations", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    if args.mode == "micro":
+        wrong = asyncio.run(micro(args.fixtures, max(1, args.iterations)))
+    else:
+        wrong = asyncio.run(pipeline(args.fixtures, max(1, args.rounds), max(0, args.warmup),
+                                     args.browser_only, max(1, args.concurrency)))
+    raise SystemExit(1 if wrong else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 # monitor.py — ONLY checks DATE_TEXT (whole day). Any visible "Book" in that date's region => available.
-import os, re, smtplib
+import os, re, gzip, json, time, random, asyncio, argparse, hashlib, ipaddress, smtplib, sqlite3, contextvars
 from email.mime.text import MIMEText
 from email.utils import formatdate
 from datetime import datetime
 from pathlib import Path
-from playwright.sync_api import sync_playwright
+from urllib.parse import urljoin, urlsplit, urlunsplit, unquote_plus
+import httpx
+from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright
+
+try:
+    import lxml  # noqa: F401  (optional, faster BeautifulSoup backend)
+    _BS_PARSER = "lxml"
+except ImportError:
+    _BS_PARSER = "html.parser"
 
 # -------- Config via environment --------
 TARGET_URL    = os.getenv("TARGET_URL", "https://events.nationaltheatre.org.uk/events/92540")
@@ -18,21 +27,249 @@ EMAIL_TO      = os.getenv("EMAIL_TO", "")
 ALWAYS_NOTIFY = os.getenv("ALWAYS_NOTIFY", "0") == "1"
 ARTIFACT_DIR  = Path(os.getenv("ARTIFACT_DIR", "artifacts"))
 ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+ARTIFACT_MIN_INTERVAL = float(os.getenv("ARTIFACT_MIN_INTERVAL", "900"))   # seconds between captures per URL+reason
+ARTIFACT_SCREENSHOT   = os.getenv("ARTIFACT_SCREENSHOT", "viewport")       # viewport | full | none
+ARTIFACT_IMAGE_FORMAT = os.getenv("ARTIFACT_IMAGE_FORMAT", "jpeg")         # jpeg | png
+ARTIFACT_JPEG_QUALITY = int(os.getenv("ARTIFACT_JPEG_QUALITY", "60"))
+ARTIFACT_MAX_MB       = float(os.getenv("ARTIFACT_MAX_MB", "200"))         # evict oldest files above this total
+ARTIFACT_MAX_AGE_DAYS = float(os.getenv("ARTIFACT_MAX_AGE_DAYS", "14"))    # evict files older than this
+# daemon mode (--daemon): one browser kept alive across checks
+CHECK_INTERVAL = float(os.getenv("CHECK_INTERVAL", "45"))    # seconds between checks
+CHECK_JITTER   = float(os.getenv("CHECK_JITTER", "0.2"))     # +/- fraction of CHECK_INTERVAL
+RECYCLE_CHECKS = int(os.getenv("RECYCLE_CHECKS", "50"))      # fresh browser context every N polling cycles
+MAX_BROWSER_MB = int(os.getenv("MAX_BROWSER_MB", "800"))     # relaunch browser above this RSS (Linux only)
+# watch list (--config): many URLs/dates checked concurrently over one browser
+WATCH_CONFIG   = os.getenv("WATCH_CONFIG", "")                 # .json / .toml / .yaml file; overrides TARGET_URL/DATE_TEXT
+CONCURRENCY    = int(os.getenv("CONCURRENCY", "4"))          # max pages open at once
+# per-check latency budget for the browser path (seconds); waits are event-driven, this only caps them
+CHECK_BUDGET   = float(os.getenv("CHECK_BUDGET", "8"))
+LOG_TIMINGS    = os.getenv("LOG_TIMINGS", "1") == "1"       # one per-phase timing line per checked URL
+IN_PAGE_EVAL   = os.getenv("IN_PAGE_EVAL", "1") == "1"      # decide all dates in one page.evaluate (0 = locators only)
+LOG_FORMAT     = os.getenv("LOG_FORMAT", "text")             # text | json (one JSON object per check/status/alert)
+METRICS_PORT   = int(os.getenv("METRICS_PORT", "0"))         # daemon mode: serve Prometheus text on this port
+METRICS_HOST   = os.getenv("METRICS_HOST", "127.0.0.1")
+# request interception (browser path): skip assets we never read; counts are logged per check
+BLOCK_RESOURCES       = os.getenv("BLOCK_RESOURCES", "1") == "1"
+BLOCK_RESOURCE_TYPES  = os.getenv("BLOCK_RESOURCE_TYPES", "image,media,font")   # Playwright resource types
+ALLOW_RESOURCE_TYPES  = os.getenv("ALLOW_RESOURCE_TYPES", "")    # if set, every other type is blocked
+BLOCK_DOMAINS         = os.getenv("BLOCK_DOMAINS", "googletagmanager.com,google-analytics.com,doubleclick.net,"
+                                  "googleadservices.com,googlesyndication.com,facebook.net,facebook.com,"
+                                  "hotjar.com,clarity.ms,bing.com,tiktok.com,quantserve.com,scorecardresearch.com,"
+                                  "newrelic.com,nr-data.net,cookielaw.org,onetrust.com")
+BLOCK_THIRD_PARTY_JS  = os.getenv("BLOCK_THIRD_PARTY_JS", "0") == "1"   # scripts not served from the page's site
+STRIP_TRACKING_PARAMS = os.getenv("STRIP_TRACKING_PARAMS", "1") == "1"  # drop _gl/_gcl_au/utm_*/gclid... from URLs
+# state store: check history + current status per (url, date); notifications only on status changes
+STATE_DB        = os.getenv("STATE_DB", "state.db")             # "" = stateless (notify on every check)
+NOTIFY_COOLDOWN = float(os.getenv("NOTIFY_COOLDOWN", "900"))    # min seconds between alerts for one date
+STATE_KEEP_DAYS = float(os.getenv("STATE_KEEP_DAYS", "90"))     # prune check rows older than this
+# notifications: queued off the check loop, batched into digests, retried with backoff
+NOTIFY_CHANNELS     = os.getenv("NOTIFY_CHANNELS", "email")    # comma list of: email, webhook, command
+NOTIFY_BATCH_WINDOW = float(os.getenv("NOTIFY_BATCH_WINDOW", "5"))   # seconds to gather alerts into one digest
+NOTIFY_RETRIES      = int(os.getenv("NOTIFY_RETRIES", "4"))
+WEBHOOK_URL         = os.getenv("WEBHOOK_URL", "")              # receives the alert JSON via POST
+NOTIFY_COMMAND      = os.getenv("NOTIFY_COMMAND", "")           # shell command; alert JSON on stdin
+SMTP_STARTTLS       = os.getenv("SMTP_STARTTLS", "1") == "1"
+SMTP_TIMEOUT        = float(os.getenv("SMTP_TIMEOUT", "30"))
+# HTTP fast path: plain GET + BeautifulSoup first, Chromium only for dates it can't decide
+HTTP_FAST_PATH = os.getenv("HTTP_FAST_PATH", "1") == "1"
+HTTP_TIMEOUT   = float(os.getenv("HTTP_TIMEOUT", "10"))
+USER_AGENT     = os.getenv("USER_AGENT", "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                                         "(KHTML, like Gecko) Chrome/127.0 Safari/537.36")
 
-# -------- Email --------
-def send_email(subject: str, body: str) -> None:
-    if not (SMTP_HOST and SMTP_PORT and SMTP_USER and SMTP_PASS and EMAIL_TO):
-        print("[WARN] Email not configured. Skipping send.\n" + body)
-        return
-    msg = MIMEText(body, _charset="utf-8")
-    msg["Subject"] = subject
-    msg["From"]    = EMAIL_FROM
-    msg["To"]      = EMAIL_TO
-    msg["Date"]    = formatdate(localtime=True)
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as s:
-        s.starttls()
-        s.login(SMTP_USER, SMTP_PASS)
-        s.sendmail(EMAIL_FROM, [e.strip() for e in EMAIL_TO.split(",") if e.strip()], msg.as_string())
+# -------- Notifications --------
+class EmailChannel:
+    """SMTP channel keeping one authenticated connection open between sends (checked with NOOP first)."""
+    name = "email"
+
+    def __init__(self):
+        self._smtp = None
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._drop()
+        s = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                s.starttls()
+            if SMTP_USER and SMTP_PASS:
+                s.login(SMTP_USER, SMTP_PASS)
+        except Exception:
+            s.close()
+            raise
+        self._smtp = s
+        return s
+
+    def _drop(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+        self._smtp = None
+
+    def _send(self, subject: str, body: str) -> None:
+        if not (SMTP_HOST and SMTP_PORT and EMAIL_FROM and EMAIL_TO):
+            _log("warn", "Email not configured. Skipping send.\n" + body)
+            return
+        msg = MIMEText(body, _charset="utf-8")
+        msg["Subject"] = subject
+        msg["From"]    = EMAIL_FROM
+        msg["To"]      = EMAIL_TO
+        msg["Date"]    = formatdate(localtime=True)
+        try:
+            self._connection().sendmail(EMAIL_FROM, [e.strip() for e in EMAIL_TO.split(",") if e.strip()],
+                                        msg.as_string())
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._drop()
+            raise
+
+    async def send(self, subject: str, body: str, alerts: list) -> None:
+        await asyncio.to_thread(self._send, subject, body)
+
+    async def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                await asyncio.to_thread(self._smtp.quit)
+            except Exception:
+                pass
+            self._drop()
+
+class WebhookChannel:
+    """POSTs {"subject", "body", "alerts": [...]} as JSON to WEBHOOK_URL."""
+    name = "webhook"
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(timeout=HTTP_TIMEOUT)
+
+    async def send(self, subject: str, body: str, alerts: list) -> None:
+        r = await self.client.post(WEBHOOK_URL, json={"subject": subject, "body": body, "alerts": alerts})
+        r.raise_for_status()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+class CommandChannel:
+    """Runs NOTIFY_COMMAND through the shell with the same JSON document on stdin."""
+    name = "command"
+    timeout = 60.0      # seconds before the command is killed (and the send retried)
+
+    async def send(self, subject: str, body: str, alerts: list) -> None:
+        proc = await asyncio.create_subprocess_shell(NOTIFY_COMMAND, stdin=asyncio.subprocess.PIPE)
+        payload = json.dumps({"subject": subject, "body": body, "alerts": alerts}).encode()
+        try:
+            await asyncio.wait_for(proc.communicate(payload), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()         # a retry must not leave the hung command running next to a new one
+            await proc.wait()
+            raise
+        if proc.returncode:
+            raise RuntimeError(f"notify command exited with {proc.returncode}")
+
+    async def close(self) -> None:
+        pass
+
+def build_channels() -> list:
+    channels = []
+    for name in _csv(NOTIFY_CHANNELS):
+        if name == "email":
+            channels.append(EmailChannel())
+        elif name == "webhook" and WEBHOOK_URL:
+            channels.append(WebhookChannel())
+        elif name == "command" and NOTIFY_COMMAND:
+            channels.append(CommandChannel())
+        else:
+            _log("warn", f"notification channel {name!r} is unknown or not configured; ignoring")
+    return channels
+
+def _digest(alerts: list):
+    """(subject, body) for one or more alerts; a single alert keeps the classic one-line subject."""
+    if len(alerts) == 1:
+        a = alerts[0]
+        return (f"NT tickets {a['status'].upper()}: {a['date']}",
+                f"Status: {a['status']}\nURL: {a['url']}\nUTC: {a['utc']}\n")
+    available = sum(a["status"] == "available" for a in alerts)
+    subject = f"NT tickets: {len(alerts)} updates" + (f" ({available} available)" if available else "")
+    body = "\n".join(f"{a['date']}: {a['status']}\nURL: {a['url']}\nUTC: {a['utc']}\n" for a in alerts)
+    return subject, body
+
+class Notifier:
+    """
+    Background dispatcher so a slow channel never delays the next check, nor the other channels.
+    put() only enqueues, on one queue per channel; each channel's worker sends alerts arriving within
+    NOTIFY_BATCH_WINDOW seconds of the first one as a single digest and retries with exponential backoff
+    (NOTIFY_RETRIES). Alerts queued while a channel is retrying go out as its next digest.
+    """
+    def __init__(self, channels: list):
+        self.channels = channels
+        self.queues = [asyncio.Queue() for _ in channels]
+        self._tasks = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._run(ch, q)) for ch, q in zip(self.channels, self.queues)]
+
+    def put(self, alert: dict) -> None:
+        for q in self.queues:
+            q.put_nowait(alert)
+
+    async def _run(self, channel, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch, until = [first], loop.time() + NOTIFY_BATCH_WINDOW
+            while True:
+                try:
+                    item = queue.get_nowait() if stopping else \
+                        await asyncio.wait_for(queue.get(), max(until - loop.time(), 0))
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is None:
+                    stopping = True     # flush what is already queued without waiting out the window
+                else:
+                    batch.append(item)
+            subject, body = _digest(batch)
+            await self._deliver(channel, subject, body, batch)
+
+    async def _deliver(self, channel, subject: str, body: str, alerts: list) -> None:
+        for attempt in range(NOTIFY_RETRIES + 1):
+            t = time.monotonic()
+            try:
+                await channel.send(subject, body, alerts)
+                METRICS.observe_notify(channel.name, True, time.monotonic() - t)
+                if LOG_FORMAT == "json":
+                    _log_event("notify", channel=channel.name, alerts=len(alerts), attempt=attempt + 1,
+                               ms=round((time.monotonic() - t) * 1000))
+                return
+            except Exception as e:
+                METRICS.observe_notify(channel.name, False, time.monotonic() - t)
+                if attempt == NOTIFY_RETRIES:
+                    _log("warn", f"{channel.name} notification failed, giving up ({type(e).__name__}: {e})")
+                    return
+                delay = min(2 ** attempt, 60) * random.uniform(0.8, 1.2)
+                _log("warn", f"{channel.name} notification failed ({type(e).__name__}: {e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def close(self, timeout: float = 120) -> None:
+        """Deliver everything queued (no batching wait), then close the channels."""
+        if self._tasks:
+            for q in self.queues:
+                q.put_nowait(None)
+            _, stuck = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in stuck:
+                task.cancel()
+            if stuck:
+                await asyncio.wait(stuck)
+                names = ", ".join(ch.name for ch, task in zip(self.channels, self._tasks) if task in stuck)
+                _log("warn", f"{names} notifications still pending at shutdown were dropped")
+        for ch in self.channels:
+            await ch.close()
 
 # -------- Helpers --------
 def _norm(s: str) -> str:
@@ -69,124 +306,1208 @@ def _date_candidates(date_text: str):
             seen.add(x); out.append(x)
     return out
 
-def _accept_banners_and_expand(page):
-    # Cookie/consent
-    for pat in [r"Accept", r"Agree", r"OK", r"I understand"]:
-        try:
-            btn = page.get_by_role("button", name=re.compile(pat, re.I))
-            if btn.is_visible():
-                btn.click(); page.wait_for_timeout(300); break
-        except Exception:
-            pass
+_CONSENT_RE = re.compile(r"Accept|Agree|\bOK\b|I understand", re.I)
+_EXPAND_PATTERNS = [r"Show all", r"Show more", r"Load more", r"See more", r"More dates", r"Show.*performances"]
+
+# Resolves once the DOM has had no mutations for quietMs (or after maxMs); returns elapsed ms.
+_DOM_QUIET_JS = """([quietMs, maxMs]) => new Promise(resolve => {
+  const start = performance.now();
+  let timer, cap;
+  const done = () => { obs.disconnect(); clearTimeout(timer); clearTimeout(cap); resolve(performance.now() - start); };
+  const obs = new MutationObserver(() => { clearTimeout(timer); timer = setTimeout(done, quietMs); });
+  obs.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+  timer = setTimeout(done, quietMs);
+  cap = setTimeout(done, maxMs);
+})"""
+
+def _ms_left(deadline: float, cap_ms: float = 0) -> float:
+    """Milliseconds until deadline (at least 1), optionally capped."""
+    left = max((deadline - time.monotonic()) * 1000, 1)
+    return min(left, cap_ms) if cap_ms else left
+
+async def _wait_dom_quiet(page, deadline: float, quiet_ms: int = 250) -> None:
+    try:
+        await page.evaluate(_DOM_QUIET_JS, [quiet_ms, _ms_left(deadline)])
+    except Exception:
+        pass
+
+async def _wait_ready(page, dates, deadline: float) -> None:
+    """Return as soon as any requested date is visible or the DOM stops changing, whichever comes first."""
+    rx = re.compile("|".join(re.escape(c) for d in dates for c in _date_candidates(d)), re.I)
+    waiters = [asyncio.ensure_future(page.get_by_text(rx).first.wait_for(state="visible", timeout=_ms_left(deadline))),
+               asyncio.ensure_future(_wait_dom_quiet(page, deadline))]
+    _, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    for t in pending:
+        t.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+
+async def _accept_banners_and_expand(page, deadline: float) -> None:
+    # Cookie/consent: click, then wait for the button to go away rather than a fixed sleep
+    try:
+        btn = page.get_by_role("button", name=_CONSENT_RE).first
+        if await btn.is_visible():
+            await btn.click(timeout=_ms_left(deadline, 2000))
+            await btn.wait_for(state="hidden", timeout=_ms_left(deadline, 1000))
+    except Exception:
+        pass
     # Show more
-    for pat in [r"Show all", r"Show more", r"Load more", r"See more", r"More dates", r"Show.*performances"]:
+    for pat in _EXPAND_PATTERNS:
+        if time.monotonic() >= deadline:
+            return
         try:
-            btn = page.get_by_role("button", name=re.compile(pat, re.I))
-            if btn.is_visible():
-                btn.click(); page.wait_for_timeout(500)
+            btn = page.get_by_role("button", name=re.compile(pat, re.I)).first
+            if await btn.is_visible():
+                await btn.click(timeout=_ms_left(deadline, 2000))
+                await _wait_dom_quiet(page, deadline)   # settle before matching the next pattern (same button?)
         except Exception:
             pass
-    # Wait & force lazy content
-    page.wait_for_load_state("domcontentloaded")
-    page.wait_for_timeout(1500)
-    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-    page.wait_for_timeout(600)
+    # Force lazy content, then wait until the list stops growing
+    try:
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+    except Exception:
+        pass
+    await _wait_dom_quiet(page, deadline)
 
-def _any_visible(locator, max_scan: int = 60) -> bool:
+async def _any_visible(locator, max_scan: int = 60) -> bool:
     """Return True if any of the first N matches are visible (avoids strict-mode)."""
     try:
-        n = min(locator.count(), max_scan)
+        n = min(await locator.count(), max_scan)
     except Exception:
         n = 0
     for i in range(n):
         try:
-            if locator.nth(i).is_visible():
+            if await locator.nth(i).is_visible():
                 return True
         except Exception:
             pass
     return False
 
-def _find_date_region(page, date_text: str):
+async def _find_date_region(page, date_text: str):
     """
     Find a robust 'region' (section/div) that represents ONLY the requested date.
-    Strategy:
-      1) Try a real heading (role=heading, exact or contains).
+    Strategy (every _date_candidates variant is folded into one regex, so each step is a single lookup):
+      1) Try a real heading (role=heading, exact, then contains).
          If found, take its nearest ancestor <section>/<div> as the region.
       2) Else, find a node that contains the date text, then take its nearest ancestor section/div.
     """
-    for cand in _date_candidates(date_text):
-        # 1) Prefer headings
-        h_exact = page.get_by_role("heading", name=re.compile(rf"^{re.escape(cand)}$", re.I))
-        if h_exact.count() > 0 and h_exact.first.is_visible():
-            region = h_exact.first.locator("xpath=ancestor::*[self::section or self::div][1]")
-            if region.count() > 0:
-                return region
-        h_contains = page.get_by_role("heading", name=re.compile(re.escape(cand), re.I))
-        if h_contains.count() > 0 and h_contains.first.is_visible():
-            region = h_contains.first.locator("xpath=ancestor::*[self::section or self::div][1]")
-            if region.count() > 0:
-                return region
-
-        # 2) Generic text match → nearest meaningful container
-        node = page.get_by_text(re.compile(re.escape(cand), re.I)).first
+    alts = "|".join(re.escape(c) for c in _date_candidates(date_text))
+    exact, contains = re.compile(rf"^(?:{alts})$", re.I), re.compile(rf"(?<!\d)(?:{alts})", re.I)
+    for node in (page.get_by_role("heading", name=exact).first,
+                 page.get_by_role("heading", name=contains).first,
+                 page.get_by_text(contains).first):
         try:
-            node_found = (node.count() > 0 and node.is_visible())
+            if await node.is_visible():
+                region = node.locator("xpath=ancestor::*[self::section or self::div][1]")
+                if await region.count() > 0:
+                    return region
         except Exception:
-            node_found = False
-        if node_found:
-            region = node.locator("xpath=ancestor::*[self::section or self::div][1]")
-            if region.count() > 0:
-                return region
+            pass
     return None
 
-def _status_from_region(region) -> str:
+async def _status_from_region(region) -> str:
     # Any visible "Book" inside region -> available
     book_btns  = region.get_by_role("button", name=re.compile(r"Book\s*(tickets|now)?", re.I))
     book_links = region.locator("a:has-text('Book tickets'), a:has-text('Book now')")
-    if _any_visible(book_btns) or _any_visible(book_links):
+    if await _any_visible(book_btns) or await _any_visible(book_links):
         return "available"
 
     # Any visible 'Sold out' inside region (and no Book) -> sold out
     sold = region.get_by_text(re.compile(r"\bSold\s*out\b", re.I))
-    if _any_visible(sold):
+    if await _any_visible(sold):
         return "sold out"
 
     return "unknown"
 
-def _save_artifacts(page, tag: str):
-    ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    page.screenshot(path=str(ARTIFACT_DIR / f"{tag}_{ts}.png"), full_page=True)
-    with open(ARTIFACT_DIR / f"{tag}_{ts}.html", "w", encoding="utf-8") as f:
-        f.write(page.content())
+# In-page twin of _find_date_region + _status_from_region: one round-trip for every date.
+# Takes [{date, cands}] and returns [{date, status, text}] (text = the matched region's visible text, trimmed).
+_DECIDE_JS = r"""(items) => {
+  const norm = s => (s || "").replace(/\s+/g, " ").trim();
+  const esc = s => s.replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
+  const visible = el => {
+    if (!el || !el.isConnected) return false;
+    const r = el.getBoundingClientRect();
+    return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== "hidden";
+  };
+  const name = el => norm(el.getAttribute("aria-label") || el.innerText || el.textContent || el.value);
+  const SKIP = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE", "HEAD"]);
+  // smallest elements whose text matches rx (text nodes first, then text split across children)
+  const textMatches = (root, rx) => {
+    const out = [];
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+      const el = n.parentElement;
+      if (el && !SKIP.has(el.tagName) && rx.test(n.nodeValue) && out[out.length - 1] !== el) out.push(el);
+    }
+    if (out.length) return out;
+    for (const el of root.querySelectorAll("*")) {
+      if (SKIP.has(el.tagName) || !rx.test(norm(el.textContent))) continue;
+      if (![...el.children].some(c => rx.test(norm(c.textContent)))) out.push(el);
+    }
+    return out;
+  };
+  const regionOf = el => el.parentElement && el.parentElement.closest("section, div");
+  const headings = [...document.querySelectorAll("h1, h2, h3, h4, h5, h6, [role=heading]")];
+  const BOOK = /Book\s*(tickets|now)?/i, BOOK_LINK = /Book tickets|Book now/i, SOLD = /\bSold\s*out\b/i;
 
-# -------- Main --------
-def main():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx = browser.new_context()
-        page = ctx.new_page()
-        page.goto(TARGET_URL, wait_until="domcontentloaded")
+  const status = region => {
+    for (const el of region.querySelectorAll("button, [role=button], input[type=button], input[type=submit]"))
+      if (BOOK.test(name(el)) && visible(el)) return "available";
+    for (const el of region.querySelectorAll("a"))
+      if (BOOK_LINK.test(norm(el.textContent)) && visible(el)) return "available";
+    if (textMatches(region, SOLD).some(visible)) return "sold out";
+    return "unknown";
+  };
+
+  return items.map(({date, cands}) => {
+    const alts = cands.map(esc).join("|");
+    const exact = new RegExp(`^(?:${alts})$`, "i"), contains = new RegExp(`(?<!\\d)(?:${alts})`, "i");
+    let region = null;
+    for (const pick of [h => exact.test(name(h)), h => contains.test(name(h))]) {
+      const heading = headings.find(h => pick(h) && visible(h));
+      if (heading && (region = regionOf(heading))) break;
+    }
+    if (!region && document.body) {
+      const node = textMatches(document.body, contains).find(visible);
+      if (node) region = regionOf(node);
+    }
+    if (!region) return {date, status: "unknown: date region not found", text: ""};
+    return {date, status: status(region), text: norm(region.innerText).slice(0, 200)};
+  });
+}"""
+
+async def _evaluate_dates(page, dates) -> dict:
+    """{date_text: {"status", "text"}} for every date from a single page.evaluate (raises on script failure)."""
+    rows = await page.evaluate(_DECIDE_JS, [{"date": d, "cands": _date_candidates(d)} for d in dates])
+    return {r["date"]: {"status": r["status"], "text": r["text"]} for r in rows}
+
+# -------- Artifacts --------
+_VOLATILE_RE = re.compile(r"<script\b[^>]*>.*?</script>|<style\b[^>]*>.*?</style>|\s(?:nonce|data-reactid|csrf[\w-]*)=\"[^\"]*\"",
+                          re.I | re.S)
+_ARTIFACT_SUFFIXES = (".html.gz", ".html", ".png", ".jpg", ".jpeg")
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:10]
+
+class ArtifactStore:
+    """
+    Debug captures for checks that ended 'unknown', kept cheap and bounded:
+      - at most one capture per URL+reason every ARTIFACT_MIN_INTERVAL seconds, judged by the mtimes of
+        that URL's files so it also holds across one-shot (cron) runs;
+      - named {reason}_{URL hash}_{DOM hash} (scripts/styles/nonces stripped before hashing), so an
+        identical page is stored once and only has its files' mtimes refreshed;
+      - HTML gzip-compressed, screenshot viewport-only JPEG by default (ARTIFACT_SCREENSHOT/_IMAGE_FORMAT);
+      - after each write, files older than ARTIFACT_MAX_AGE_DAYS and then the oldest beyond
+        ARTIFACT_MAX_MB are deleted.
+    capture() runs in the background and owns the page (it closes it), so it never delays the check.
+    """
+    def __init__(self, root: Path = ARTIFACT_DIR):
+        self.root = root
+        self._last = {}         # (url, tag) -> time of last capture started by this process (still in flight)
+        self._tasks = set()
+
+    def capture(self, page, url: str, tag: str) -> bool:
+        """Start a background capture; False (page left to the caller) if rate-limited."""
+        now = time.time()
+        prefix = f"{tag}_{_url_hash(url)}_"
+        last = max([self._last.get((url, tag), 0.0)] +
+                   [p.stat().st_mtime for p in self.root.glob(prefix + "*") if p.name.endswith(_ARTIFACT_SUFFIXES)])
+        if now - last < ARTIFACT_MIN_INTERVAL:
+            return False
+        self._last[(url, tag)] = now
+        task = asyncio.create_task(self._capture(page, url, prefix))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _capture(self, page, url: str, prefix: str) -> None:
+        try:
+            html = await page.content()
+            digest = hashlib.sha256(_VOLATILE_RE.sub("", html).encode("utf-8", "replace")).hexdigest()[:16]
+            base = self.root / f"{prefix}{digest}"
+            if base.with_name(base.name + ".html.gz").exists():
+                for p in self.root.glob(base.name + ".*"):
+                    os.utime(p)
+                return
+            shot = None
+            if ARTIFACT_SCREENSHOT != "none":
+                opts = {"full_page": ARTIFACT_SCREENSHOT == "full", "type": ARTIFACT_IMAGE_FORMAT}
+                if ARTIFACT_IMAGE_FORMAT == "jpeg":
+                    opts["quality"] = ARTIFACT_JPEG_QUALITY
+                if not opts["full_page"]:
+                    # _accept_banners_and_expand left the page scrolled to the footer
+                    await page.evaluate("window.scrollTo(0, 0)")
+                shot = await page.screenshot(**opts)
+            await asyncio.to_thread(self._write, base, url, html, shot)
+        except Exception as e:
+            _log("warn", f"artifact capture for {url} failed ({type(e).__name__}: {e})", url=url)
+        finally:
+            await _close_page(page)
+
+    def _write(self, base: Path, url: str, html: str, shot) -> None:
+        ts = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        with gzip.open(base.with_name(base.name + ".html.gz"), "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(f"<!-- {url} captured {ts} -->\n{html}")
+        if shot:
+            base.with_name(base.name + (".jpg" if ARTIFACT_IMAGE_FORMAT == "jpeg" else ".png")).write_bytes(shot)
+        self._evict()
+
+    def _evict(self) -> None:
+        files = []
+        for p in self.root.iterdir():
+            if p.is_file() and p.name.endswith(_ARTIFACT_SUFFIXES):
+                st = p.stat()
+                files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+        cutoff = time.time() - ARTIFACT_MAX_AGE_DAYS * 86400 if ARTIFACT_MAX_AGE_DAYS else 0
+        total = sum(size for _, size, _ in files)
+        for mtime, size, p in files:
+            if mtime >= cutoff and (not ARTIFACT_MAX_MB or total <= ARTIFACT_MAX_MB * 1024 * 1024):
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    async def drain(self) -> None:
+        """Wait for captures in flight; ones stuck on a wedged browser are cancelled after the check deadline."""
+        if self._tasks:
+            _, stuck = await asyncio.wait(list(self._tasks), timeout=CHECK_BUDGET + _CHECK_GRACE)
+            for task in stuck:
+                task.cancel()
+            if stuck:
+                await asyncio.wait(stuck)
+
+# -------- HTTP fast path --------
+_JSON_ENDPOINT_RE = re.compile(
+    r"""["'](?P<u>(?:https?://[^"'\s<>]+)?/[^"'\s<>]*?(?:availability|performances?)[^"'\s<>]*)["']""", re.I)
+_TEMPLATE_URL_RE = re.compile(r"[{}]|<%")    # ${host}, {{api}}, <%= url %> left in inline JS
+_BOOK_RE = re.compile(r"Book\s*(tickets|now)?", re.I)
+_BOOK_LINK_RE = re.compile(r"Book\s*(tickets|now)", re.I)
+_SOLD_RE = re.compile(r"\bSold\s*out\b", re.I)
+
+class HttpFetcher:
+    """
+    Pooled keep-alive HTTP client shared by every check.
+    Remembers ETag/Last-Modified per URL and sends conditional GETs; a 304 reuses the cached body.
+    """
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT, follow_redirects=True,
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "en-GB,en;q=0.9"},
+            limits=httpx.Limits(max_keepalive_connections=max(CONCURRENCY, 4)))
+        self._cache = {}       # url -> (etag, last_modified, content_type, text)
+        self._endpoints = {}   # page url -> detected availability JSON url ("" = none)
+
+    async def get(self, url: str, accept: str = "text/html,application/json;q=0.9,*/*;q=0.8"):
+        """Return (content_type, text); raises httpx.HTTPError on failure."""
+        headers = {"Accept": accept}
+        cached = self._cache.get(url)
+        if cached:
+            if cached[0]:
+                headers["If-None-Match"] = cached[0]
+            if cached[1]:
+                headers["If-Modified-Since"] = cached[1]
+        r = await self.client.get(url, headers=headers)
+        if r.status_code == 304 and cached:
+            return cached[2], cached[3]
+        r.raise_for_status()
+        ctype = r.headers.get("content-type", "").split(";")[0].strip().lower()
+        if r.headers.get("etag") or r.headers.get("last-modified"):
+            self._cache[url] = (r.headers.get("etag"), r.headers.get("last-modified"), ctype, r.text)
+        return ctype, r.text
+
+    async def aclose(self):
+        await self.client.aclose()
+
+def _static_visible(el) -> bool:
+    """Best effort without layout: reject hidden/aria-hidden/display:none elements and their descendants."""
+    while el is not None and getattr(el, "name", None) not in (None, "[document]"):
+        style = (el.get("style") or "").replace(" ", "").lower()
+        if (el.has_attr("hidden") or el.get("aria-hidden") == "true"
+                or "display:none" in style or "visibility:hidden" in style):
+            return False
+        el = el.parent
+    return True
+
+def _soup_region(soup, date_text: str):
+    """Static twin of _find_date_region: heading (exact, then contains), else any text node; nearest section/div."""
+    headings = [h for h in soup.find_all(re.compile(r"^h[1-6]$")) if _static_visible(h)]
+    for cand in _date_candidates(date_text):
+        exact = re.compile(rf"^{re.escape(cand)}$", re.I)
+        contains = re.compile(rf"(?<!\d){re.escape(cand)}", re.I)   # '6 August' must not match '16 August'
+        for rx in (exact, contains):
+            for h in headings:
+                if rx.search(_norm(h.get_text(" "))):
+                    region = h.find_parent(["section", "div"])
+                    if region is not None:
+                        return region
+        for node in soup.find_all(string=contains):
+            if node.parent is not None and _static_visible(node.parent):
+                region = node.parent.find_parent(["section", "div"])
+                if region is not None:
+                    return region
+    return None
+
+def _soup_status(region) -> str:
+    """
+    Static twin of _status_from_region. Stylesheets aren't applied here, so a Book control sharing its
+    row with 'Sold out' (typically a visually hidden link) doesn't count as available.
+    """
+    books = [el for el in region.find_all(lambda t: t.name in ("button", "a") or t.get("role") == "button")
+             if (_BOOK_LINK_RE if el.name == "a" else _BOOK_RE).search(_norm(el.get_text(" "))) and _static_visible(el)]
+    for el in books:
+        row = el.find_parent(["li", "tr", "div", "section"]) or region
+        if not row.find(string=_SOLD_RE):
+            return "available"
+    for node in region.find_all(string=_SOLD_RE):
+        if _static_visible(node.parent):
+            return "sold out" if not books else "unknown"
+    return "unknown"
+
+def _html_statuses(html: str, dates) -> dict:
+    soup = BeautifulSoup(html, _BS_PARSER)
+    for t in soup(["script", "style", "noscript", "template"]):
+        t.decompose()
+    results = {}
+    for date_text in dates:
+        region = _soup_region(soup, date_text)
+        results[date_text] = _soup_status(region) if region is not None else "unknown"
+    return results
+
+def _iso_date(date_text: str) -> str:
+    """'Sat 16 August 2025' -> '2025-08-16' ('' if it doesn't parse)."""
+    m = re.search(r"\d", date_text)
+    tail = date_text[m.start():].strip() if m else date_text
+    for fmt in ("%d %B %Y", "%d %b %Y"):
+        try:
+            return datetime.strptime(tail, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return ""
+
+_NEGATED_STATUS_RE = re.compile(r"not(available|onsale|bookable)|unavailable|soldout|closed|offsale|nobook")
+_POSITIVE_STATUSES = {"available", "onsale", "bookable", "booknow", "bookingopen"}
+
+def _json_verdict(obj: dict) -> str:
+    """
+    Status of one performance-like JSON object from its own keys. Fast-path results skip the browser,
+    so string statuses are only trusted when unambiguous; anything else returns '' (left to Playwright).
+    """
+    keys = {re.sub(r"[_\-]", "", k).lower(): v for k, v in obj.items() if isinstance(k, str)}
+    for k in ("soldout", "issoldout"):
+        if isinstance(keys.get(k), bool):
+            return "sold out" if keys[k] else "available"
+    for k in ("available", "isavailable", "onsale", "isonsale", "bookable", "isbookable"):
+        if isinstance(keys.get(k), bool):
+            return "available" if keys[k] else "sold out"
+    for k in ("status", "availability", "availabilitystatus", "state"):
+        v = keys.get(k)
+        if isinstance(v, str):
+            token = re.sub(r"[^a-z]", "", v.lower())   # 'Not available' / 'NOT_BOOKABLE' -> 'notavailable' / 'notbookable'
+            if _NEGATED_STATUS_RE.search(token):
+                return "sold out"
+            if token in _POSITIVE_STATUSES:
+                return "available"
+            return ""
+    return ""
+
+def _json_statuses(data, dates) -> dict:
+    """
+    Walk an availability JSON document; every object whose own string values mention a date
+    (any _date_candidates variant or its ISO form) votes with _json_verdict.
+    A date is available if any of its performances is, sold out if all that spoke are.
+    """
+    pats = {}
+    for d in dates:
+        alts = [re.escape(c) for c in _date_candidates(d)]
+        if _iso_date(d):
+            alts.append(re.escape(_iso_date(d)))
+        pats[d] = re.compile("|".join(rf"(?<!\d){a}" for a in alts), re.I)
+    votes = {d: [] for d in dates}
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+            text = " ".join(v for v in node.values() if isinstance(v, str))
+            if not text:
+                continue
+            verdict = None
+            for d, rx in pats.items():
+                if rx.search(text):
+                    verdict = _json_verdict(node) if verdict is None else verdict
+                    if verdict:
+                        votes[d].append(verdict)
+    results = {}
+    for d, v in votes.items():
+        results[d] = "available" if "available" in v else ("sold out" if v else "unknown")
+    return results
+
+async def _find_json_endpoint(fetcher: HttpFetcher, page_url: str, html: str) -> str:
+    """Look for an availability/performances JSON URL referenced by the page; remembered per page URL."""
+    if page_url in fetcher._endpoints:
+        return fetcher._endpoints[page_url]
+    found = ""
+    seen = set()
+    for m in _JSON_ENDPOINT_RE.finditer(html.replace("\\/", "/")):   # also inside JSON-escaped scripts
+        if _TEMPLATE_URL_RE.search(m.group("u")):
+            continue    # "https://${host}/availability", "{{api}}/performances" ...: not a real URL
+        try:
+            u = urljoin(page_url, m.group("u"))
+        except ValueError:      # e.g. 'http://[not-an-ip]/availability'
+            continue
+        if u in seen or u.split("#")[0] == page_url.split("#")[0]:
+            continue
+        seen.add(u)
+        if len(seen) > 3:
+            break
+        try:
+            ctype, _ = await fetcher.get(u, accept="application/json")
+        except (httpx.HTTPError, httpx.InvalidURL, ValueError):
+            continue
+        if "json" in ctype:
+            found = u
+            break
+    fetcher._endpoints[page_url] = found
+    return found
+
+async def http_statuses(fetcher: HttpFetcher, url: str, dates) -> dict:
+    """
+    Decide as many dates as possible without a browser. Returns only the dates that came out
+    'available' or 'sold out'; anything else is left for the Playwright path.
+    """
+    try:
+        ctype, text = await fetcher.get(url)
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError):
+        return {}
+    if "json" in ctype:
+        try:
+            results = _json_statuses(json.loads(text), dates)
+        except ValueError:
+            results = {}
+    else:
+        results = _html_statuses(text, dates)
+        pending = [d for d in dates if results.get(d) == "unknown"]
+        endpoint = await _find_json_endpoint(fetcher, url, text) if pending else ""
+        if endpoint:
+            try:
+                _, body = await fetcher.get(endpoint, accept="application/json")
+                results.update(_json_statuses(json.loads(body), pending))
+            except (httpx.HTTPError, httpx.InvalidURL, ValueError):
+                pass
+    return {d: st for d, st in results.items() if st in ("available", "sold out")}
+
+# -------- Resource blocking --------
+_TRACKING_PARAM_RE = re.compile(r"^(_gl|_ga|_gac|_gcl_\w+|gclid|gbraid|wbraid|dclid|fbclid|msclkid|mc_cid|mc_eid|utm_\w+)$", re.I)
+_MULTI_PART_TLDS = {"co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "com.au", "co.nz", "co.jp", "com.br"}
 
-        _accept_banners_and_expand(page)
+def _clean_url(url: str) -> str:
+    """
+    Drop analytics/ad tracking params from the query and a '#_gl=...'-style fragment.
+    Only the matching '&'-separated segments are removed; everything else is kept byte for byte.
+    """
+    parts = urlsplit(url)
+    query = "&".join(seg for seg in parts.query.split("&")
+                     if not _TRACKING_PARAM_RE.match(unquote_plus(seg.split("=", 1)[0])))
+    fragment = parts.fragment
+    if "=" in fragment and _TRACKING_PARAM_RE.match(fragment.split("=", 1)[0]):
+        fragment = ""   # GA cross-domain linker: '#_gl=1*...*_gcl_au*...'
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, fragment))
+
+def _site(host: str) -> str:
+    """Registrable domain, roughly: events.nationaltheatre.org.uk -> nationaltheatre.org.uk; IPs unchanged."""
+    host = (host or "").lower().rstrip(".")
+    try:
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        pass
+    labels = host.split(".")
+    n = 3 if ".".join(labels[-2:]) in _MULTI_PART_TLDS else 2
+    return ".".join(labels[-n:])
+
+def _csv(s: str) -> set:
+    return {x.strip().lower() for x in s.split(",") if x.strip()}
+
+_BLOCK_TYPES, _ALLOW_TYPES, _BLOCK_DOMAINS = _csv(BLOCK_RESOURCE_TYPES), _csv(ALLOW_RESOURCE_TYPES), _csv(BLOCK_DOMAINS)
+
+def _block_reason(resource_type: str, host: str, page_site: str) -> str:
+    """Why a subresource should be aborted ('' = let it through)."""
+    host = (host or "").lower()
+    if any(host == d or host.endswith("." + d) for d in _BLOCK_DOMAINS):
+        return "domain"
+    if resource_type in _BLOCK_TYPES or (_ALLOW_TYPES and resource_type not in _ALLOW_TYPES):
+        return resource_type
+    if BLOCK_THIRD_PARTY_JS and resource_type == "script" and _site(host) != page_site:
+        return "third-party script"
+    return ""
+
+async def _watch_network(page, url: str, stats: dict) -> None:
+    """
+    Count requests/bytes on `page` into `stats` and, with BLOCK_RESOURCES, abort what _block_reason rejects.
+    Bytes are a lower bound: only Content-Length is counted (reading real sizes would cost a driver
+    round-trip per response), so chunked responses, often the HTML document itself, count as 0.
+    Blocked requests are never sent, so only their number (per reason) is known, not their size.
+    """
+    stats.setdefault("requests", 0); stats.setdefault("bytes", 0); stats.setdefault("blocked", 0)
+    calls = _PW_CALLS.get()     # route handlers run in the driver's task, outside this check's context
+
+    def on_response(response):
+        stats["requests"] += 1
+        try:
+            stats["bytes"] += int(response.headers.get("content-length") or 0)
+        except ValueError:
+            pass
+    page.on("response", on_response)
+
+    if not BLOCK_RESOURCES:
+        return
+    page_site = _site(urlsplit(url).hostname)
+
+    async def handle(route):
+        req = route.request
+        reason = "" if req.is_navigation_request() else _block_reason(req.resource_type, urlsplit(req.url).hostname, page_site)
+        if calls is not None:
+            calls[0] += 1       # the continue_/abort below
+        if not reason:
+            await route.continue_()
+            return
+        stats["blocked"] += 1
+        by = stats.setdefault("blocked_by", {})
+        by[reason] = by.get(reason, 0) + 1
+        await route.abort("blockedbyclient")
+    await page.route("**/*", handle)
+
+# -------- Watch list --------
+def load_targets(path: str = ""):
+    """
+    Return (targets, concurrency) where targets is {url: [date_text, ...]}.
+    Config file shape (JSON shown; TOML/YAML use the same keys):
+      {"concurrency": 4,
+       "targets": [{"url": "https://events.nationaltheatre.org.uk/events/92540",
+                    "dates": ["Sat 16 August 2025", "Sun 17 August 2025"]}]}
+    Entries sharing a URL are merged so the page is loaded once per cycle.
+    Without a config file, the single TARGET_URL/DATE_TEXT pair is watched.
+    """
+    if not path:
+        return {(_clean_url(TARGET_URL) if STRIP_TRACKING_PARAMS else TARGET_URL): [DATE_TEXT]}, CONCURRENCY
+    p = Path(path)
+    suffix = p.suffix.lower()
+    if suffix == ".toml":
+        import tomllib
+        with open(p, "rb") as f:
+            cfg = tomllib.load(f)
+    elif suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("[ERROR] YAML config needs PyYAML: pip install pyyaml")
+        with open(p, encoding="utf-8") as f:
+            cfg = yaml.safe_load(f) or {}
+    else:
+        with open(p, encoding="utf-8") as f:
+            cfg = json.load(f)
+
+    targets = {}
+    for i, t in enumerate(cfg.get("targets") or []):
+        url = (t.get("url") or "").strip()
+        if url and STRIP_TRACKING_PARAMS:
+            url = _clean_url(url)
+        dates = t.get("dates") or ([t["date"]] if t.get("date") else [])
+        if isinstance(dates, str):
+            dates = [dates]
+        if not url or not dates:
+            raise SystemExit(f"[ERROR] {path}: target #{i + 1} needs a 'url' and at least one date")
+        bucket = targets.setdefault(url, [])
+        for d in dates:
+            if d not in bucket:
+                bucket.append(d)
+    if not targets:
+        raise SystemExit(f"[ERROR] {path}: no targets configured")
+    return targets, int(cfg.get("concurrency", CONCURRENCY))
+
+# -------- Browser session --------
+def _tree_rss_mb(root_pid: int) -> float:
+    """RSS of every descendant of root_pid (playwright driver + chromium), via /proc. 0 if unavailable."""
+    try:
+        children = {}
+        for d in os.listdir("/proc"):
+            if not d.isdigit():
+                continue
+            try:
+                with open(f"/proc/{d}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(d))
+        total_kb, stack = 0, list(children.get(root_pid, []))
+        while stack:
+            pid = stack.pop()
+            stack.extend(children.get(pid, []))
+            try:
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            total_kb += int(line.split()[1]); break
+            except OSError:
+                pass
+        return total_kb / 1024
+    except OSError:
+        return 0.0
+
+class BrowserSession:
+    """
+    One Chromium process reused across polling cycles; every check opens its own page in a shared context.
+    The browser is launched lazily by the first check that needs it (the HTTP fast path may need none).
+    ensure() runs between cycles: it replaces the context every RECYCLE_CHECKS cycles and drops the
+    browser after a crash or when its RSS grows past MAX_BROWSER_MB, so the next check relaunches it.
+    run_cycle() also drops it when every browser check of a cycle failed (hung but still connected).
+    """
+    def __init__(self):
+        self._pw = None
+        self._lock = asyncio.Lock()
+        self.browser = self.ctx = None
+        self.cycles = 0
+        self.ok = self.failed = 0     # browser checks of the current cycle
+
+    async def _launch(self):
+        await self.close_browser()
+        if self._pw is None:
+            # the driver's reader task (which also runs every route handler) copies the current context:
+            # start it outside any check, or all of its round-trips would count into this check's _PW_CALLS
+            token = _PW_CALLS.set(None)
+            try:
+                self._pw = await async_playwright().start()
+            finally:
+                _PW_CALLS.reset(token)
+        self.browser = await self._pw.chromium.launch(headless=True)
+        self.ctx = await self.browser.new_context()
+        self.cycles = 0
+
+    async def ensure_started(self) -> bool:
+        """Launch the browser if needed; True if this call launched it."""
+        async with self._lock:
+            if self.browser is None:
+                await self._launch()
+                return True
+            return False
+
+    async def ensure(self):
+        self.ok = self.failed = 0
+        if self.browser is None:
+            return
+        if not self.browser.is_connected():
+            await self.close_browser()
+        elif MAX_BROWSER_MB and _tree_rss_mb(os.getpid()) > MAX_BROWSER_MB:
+            _log("info", f"browser RSS above {MAX_BROWSER_MB} MB, relaunching")
+            await self.close_browser()
+        elif RECYCLE_CHECKS and self.cycles and self.cycles % RECYCLE_CHECKS == 0:
+            try:
+                await self.ctx.close()
+            except Exception:
+                pass
+            self.ctx = await self.browser.new_context()
+        self.cycles += 1
+
+    async def close_browser(self):
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+        self.browser = self.ctx = None
+
+    async def close(self):
+        await self.close_browser()
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+# -------- Metrics --------
+# Playwright driver round-trips made by the current check (each check runs in its own task/context).
+_PW_CALLS = contextvars.ContextVar("pw_calls", default=None)
+
+def _install_call_counter() -> None:
+    """Count every request sent to the Playwright driver into _PW_CALLS (no-op if internals moved)."""
+    try:
+        from playwright._impl._connection import Channel
+    except ImportError:
+        return
+    inner_send = getattr(Channel, "inner_send", None)
+    if inner_send is None or getattr(inner_send, "_counted", False):
+        return
+    async def counted(self, *args, **kwargs):
+        box = _PW_CALLS.get()
+        if box is not None:
+            box[0] += 1
+        return await inner_send(self, *args, **kwargs)
+    counted._counted = True
+    Channel.inner_send = counted
+
+_install_call_counter()
+
+def _rss_mb() -> float:
+    """Current RSS of this process plus the playwright driver and browser below it (sampled after each check)."""
+    own = 0.0
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    own = int(line.split()[1]) / 1024; break
+    except OSError:
+        pass
+    return own + _tree_rss_mb(os.getpid())
+
+def _log_event(event: str, **fields) -> None:
+    print(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, separators=(",", ":")), flush=True)
+
+def _log(level: str, message: str, **fields) -> None:
+    """Diagnostics: a "warn"/"info" event in LOG_FORMAT=json, otherwise a '[WARN] message' line."""
+    if LOG_FORMAT == "json":
+        _log_event(level, message=message, **fields)
+    else:
+        print(f"[{level.upper()}] {message}", flush=True)
+
+def _escape_label(value) -> str:
+    """Label value as the Prometheus text format requires: backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metrics:
+    """In-process counters/gauges behind the optional Prometheus text endpoint (METRICS_PORT, daemon mode)."""
+    def __init__(self):
+        self.counters = {}     # (name, labels) -> float
+        self.gauges = {}
+        self.peak_rss_mb = 0.0
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe_check(self, url: str, results: dict, timings: dict, stats: dict, calls: int, rss_mb: float) -> None:
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+        self.inc("nt_checks_total", url=url)
+        for phase, ms in timings.items():
+            self.inc("nt_check_phase_seconds_sum", ms / 1000, phase=phase)
+            self.inc("nt_check_phase_seconds_count", phase=phase)
+            self.set("nt_check_phase_last_seconds", ms / 1000, url=url, phase=phase)
+        self.inc("nt_page_requests_total", stats.get("requests", 0))
+        self.inc("nt_page_bytes_total", stats.get("bytes", 0))
+        self.inc("nt_blocked_requests_total", stats.get("blocked", 0))
+        self.inc("nt_playwright_calls_total", calls)
+        for d, st in results.items():
+            self.set("nt_date_available", 1 if st == "available" else (0 if st == "sold out" else -1), url=url, date=d)
+        self.set("nt_rss_bytes", rss_mb * 1024 * 1024)
+        self.set("nt_peak_rss_bytes", self.peak_rss_mb * 1024 * 1024)
+
+    def observe_notify(self, channel: str, ok: bool, seconds: float) -> None:
+        self.inc("nt_notifications_total", channel=channel, result="ok" if ok else "failed")
+        self.inc("nt_notify_seconds_sum", seconds, channel=channel)
+        self.inc("nt_notify_seconds_count", channel=channel)
 
-        region = _find_date_region(page, DATE_TEXT)
+    def render(self) -> str:
+        def line(name, labels, value):
+            # full precision: '{:g}' keeps 6 digits, so byte counters would seem to stall
+            lbl = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+            return f"{name}{{{lbl}}} {float(value)!r}" if lbl else f"{name} {float(value)!r}"
+        out, typed = [], set()
+        for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+            for (name, labels), value in sorted(series.items()):
+                base = re.sub(r"_(sum|count)$", "", name) if kind == "counter" else name
+                if base not in typed:
+                    out.append(f"# TYPE {base} {'summary' if base != name else kind}")
+                    typed.add(base)
+                out.append(line(name, labels, value))
+        return "\n".join(out) + "\n"
+
+METRICS = Metrics()
+
+async def _serve_metrics(reader, writer) -> None:
+    try:
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+        body = METRICS.render().encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                     b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+# -------- Check --------
+_DECIDED = ("available", "sold out")
+
+async def _decide_with_locators(page, dates, matched: dict = None) -> dict:
+    results = {}
+    for date_text in dates:
+        region = await _find_date_region(page, date_text)
         if not region:
-            status = "unknown: date region not found"
-            _save_artifacts(page, "date_region_not_found")
-        else:
-            status = _status_from_region(region)
-            if status == "unknown":
-                _save_artifacts(page, "unknown_status")
+            results[date_text] = "unknown: date region not found"
+            continue
+        results[date_text] = await _status_from_region(region)
+        if matched is not None:
+            try:
+                matched[date_text] = _norm(await region.first.inner_text(timeout=1000))[:200]
+            except Exception:
+                pass
+    return results
+
+async def _decide(page, dates, matched: dict = None) -> dict:
+    """
+    {date_text: status}; one in-page evaluation, or the locator path if that is disabled or fails.
+    The text of each matched date region (trimmed to 200 chars) is stored in `matched` if given.
+    """
+    if IN_PAGE_EVAL:
+        try:
+            rows = await _evaluate_dates(page, dates)
+            if matched is not None:
+                matched.update({d: r["text"] for d, r in rows.items() if r["text"]})
+            return {d: r["status"] for d, r in rows.items()}
+        except Exception as e:
+            _log("warn", f"in-page evaluation failed ({type(e).__name__}: {e}); using locators")
+    return await _decide_with_locators(page, dates, matched)
+
+async def check(page, url: str, dates, deadline: float = 0, timings: dict = None, stats: dict = None,
+                matched: dict = None) -> dict:
+    """
+    Load url once and return {date_text: status} for every requested date.
+    Stops as soon as every date is decided: banners/"show more" are only handled for dates still unknown
+    after the first look. Nothing waits past `deadline` (monotonic; default now + CHECK_BUDGET).
+    Milliseconds per phase are added to `timings`, request/byte/blocked counts to `stats` and the text of
+    each matched date region to `matched`, if given.
+    """
+    deadline = deadline or time.monotonic() + CHECK_BUDGET
+    timings = {} if timings is None else timings
+    await _watch_network(page, url, {} if stats is None else stats)
+    t = time.monotonic()
+    def lap(phase):
+        nonlocal t
+        now = time.monotonic()
+        timings[phase] = timings.get(phase, 0) + round((now - t) * 1000)
+        t = now
+
+    await page.goto(url, wait_until="domcontentloaded", timeout=_ms_left(deadline))
+    lap("goto")
+    await _wait_ready(page, dates, deadline)
+    lap("ready")
+    results = await _decide(page, dates, matched)
+    lap("decide")
+
+    pending = [d for d in dates if results[d] not in _DECIDED]
+    if pending and time.monotonic() < deadline:
+        await _accept_banners_and_expand(page, deadline)
+        lap("expand")
+        results.update(await _decide(page, pending, matched))
+        lap("decide")
+
+    return results
+
+# hard cap on the whole browser part of a check: CHECK_BUDGET only bounds goto and the waits, not calls
+# without a timeout of their own (new_page, evaluate, is_visible, close) on a busy renderer or wedged browser
+_CHECK_GRACE = 5.0
+
+async def _close_page(page) -> None:
+    try:
+        await asyncio.wait_for(page.close(), _CHECK_GRACE)
+    except Exception:
+        pass
+
+async def _browser_check(session: BrowserSession, artifacts, url: str, dates, timings: dict, stats: dict,
+                         matched: dict) -> dict:
+    """check() on a fresh page of the shared context; the page is closed or handed to an artifact capture."""
+    page = await session.ctx.new_page()
+    handed_off = False
+    try:
+        found = await check(page, url, dates, timings=timings, stats=stats, matched=matched)
+        tag = _artifact_tag(found)
+        handed_off = bool(tag and artifacts and artifacts.capture(page, url, tag))
+        return found
+    finally:
+        if not handed_off:
+            await _close_page(page)
+
+def _artifact_tag(results: dict) -> str:
+    if "unknown: date region not found" in results.values():
+        return "date_region_not_found"
+    return "unknown_status" if "unknown" in results.values() else ""
 
-        ctx.close(); browser.close()
+async def _check_url(session: BrowserSession, fetcher, artifacts, sem: asyncio.Semaphore, url: str, dates) -> tuple:
+    """Returns ({date_text: status}, latency_ms)."""
+    async with sem:
+        started = time.monotonic()
+        timings, stats, matched, calls = {}, {}, {}, [0]
+        _PW_CALLS.set(calls)
+        results = {}
+        if fetcher:
+            try:
+                results = await http_statuses(fetcher, url, dates)
+            except Exception as e:
+                # the fast path is only an optimisation: anything unexpected falls through to the browser
+                _log("warn", f"HTTP fast path for {url} failed ({type(e).__name__}: {e}); using the browser", url=url)
+            timings["http"] = round((time.monotonic() - started) * 1000)
+        pending = [d for d in dates if d not in results]
+        if pending:
+            try:
+                t = time.monotonic()
+                if await session.ensure_started():
+                    timings["launch"] = round((time.monotonic() - t) * 1000)
+                results.update(await asyncio.wait_for(
+                    _browser_check(session, artifacts, url, pending, timings, stats, matched),
+                    CHECK_BUDGET + _CHECK_GRACE))
+                session.ok += 1
+            except asyncio.TimeoutError:
+                _log("warn", f"check of {url} timed out after {CHECK_BUDGET + _CHECK_GRACE:.0f}s", url=url)
+                results.update({d: "unknown: check failed" for d in pending if d not in results})
+                session.failed += 1
+            except Exception as e:
+                _log("warn", f"check of {url} failed ({type(e).__name__}: {e})", url=url)
+                results.update({d: "unknown: check failed" for d in pending if d not in results})
+                session.failed += 1
+        timings["total"] = round((time.monotonic() - started) * 1000)
+        rss = _rss_mb()
+        METRICS.observe_check(url, results, timings, stats, calls[0], rss)
+        if LOG_FORMAT == "json":
+            _log_event("check", url=url, results=results, timings_ms=timings, requests=stats.get("requests", 0),
+                       bytes=stats.get("bytes", 0), blocked=stats.get("blocked", 0),
+                       blocked_by=stats.get("blocked_by", {}), playwright_calls=calls[0],
+                       rss_mb=round(rss, 1), peak_rss_mb=round(METRICS.peak_rss_mb, 1), matched=matched)
+        elif LOG_TIMINGS:
+            print(f"[TIMING] {url} " + " ".join(f"{k}={v}ms" for k, v in timings.items()), flush=True)
+            if stats:
+                blocked = " ".join(f"{k}={v}" for k, v in stats.get("blocked_by", {}).items())
+                print(f"[NET] {url} requests={stats['requests']} kb={stats['bytes'] // 1024} "
+                      f"blocked={stats['blocked']}" + (f" ({blocked})" if blocked else "") +
+                      f" playwright_calls={calls[0]} rss={rss:.0f}MB", flush=True)
+            for d, text in matched.items():
+                print(f"[MATCH] {url} {d}: {text}", flush=True)
+        return results, timings["total"]
 
+async def run_cycle(session: BrowserSession, targets: dict, concurrency: int, fetcher=None, artifacts=None) -> dict:
+    """
+    Check every URL concurrently (at most `concurrency` at once); returns {(url, date): (status, latency_ms)}.
+    With a fetcher, the HTTP fast path runs first and the browser only sees the dates it left undecided.
+    With an ArtifactStore, pages of undecided checks are captured in the background.
+    """
+    if artifacts:
+        await artifacts.drain()     # last cycle's captures still hold pages; finish before recycling the context
+    await session.ensure()
+    sem = asyncio.Semaphore(max(1, concurrency))
+    urls = list(targets)
+    per_url = await asyncio.gather(*(_check_url(session, fetcher, artifacts, sem, u, targets[u]) for u in urls),
+                                   return_exceptions=True)
+    if session.browser is not None and (not session.browser.is_connected() or (session.failed and not session.ok)):
+        # crashed, or most likely hung (every browser check failed): drop it so the next ensure() relaunches
+        await session.close_browser()
+    out = {}
+    for u, res in zip(urls, per_url):
+        if isinstance(res, BaseException) and not isinstance(res, Exception):
+            raise res
+        if isinstance(res, Exception):
+            # one broken target must not take the others (or the whole run) down with it
+            _log("warn", f"check of {u} failed ({type(res).__name__}: {res})", url=u)
+            res = ({d: "unknown: check failed" for d in targets[u]}, 0)
+        for d, st in res[0].items():
+            out[(u, d)] = (st, res[1])
+    return out
+
+# -------- State --------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    url TEXT NOT NULL, date_text TEXT NOT NULL, status TEXT NOT NULL, ts REAL NOT NULL, latency_ms INTEGER);
+CREATE INDEX IF NOT EXISTS checks_by_target ON checks (url, date_text, ts);
+CREATE INDEX IF NOT EXISTS checks_by_ts ON checks (ts);
+CREATE TABLE IF NOT EXISTS targets (
+    url TEXT NOT NULL, date_text TEXT NOT NULL, status TEXT, since REAL, notified_at REAL, notified_status TEXT,
+    PRIMARY KEY (url, date_text));
+"""
+
+def _notifiable(status: str) -> bool:
+    return status == "available" or (ALWAYS_NOTIFY and not status.startswith("unknown"))
+
+class StateStore:
+    """
+    SQLite (WAL) log of every check plus the last known status per (url, date).
+    A cycle is one small transaction of appended/updated rows, so the file is never rewritten.
+    'unknown...' results are logged but neither count as a change nor replace the known status.
+    """
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._pruned_at = 0.0
+
+    def record(self, results: dict, now: float = 0) -> list:
+        """
+        Store a cycle's {(url, date): (status, latency_ms)}; return [(url, date, status, previous)] to notify.
+        An alert is due while the known status is notifiable and differs from the last one sent; within
+        NOTIFY_COOLDOWN of the previous alert it stays due and goes out on the first cycle after the cooldown.
+        """
+        now = now or time.time()
+        alerts = []
+        with self.db:
+            self.db.executemany("INSERT INTO checks (url, date_text, status, ts, latency_ms) VALUES (?, ?, ?, ?, ?)",
+                                [(u, d, st, now, ms) for (u, d), (st, ms) in results.items()])
+            for (u, d), (st, _) in results.items():
+                if st.startswith("unknown"):
+                    continue
+                row = self.db.execute("SELECT status, since, notified_at, notified_status FROM targets "
+                                      "WHERE url = ? AND date_text = ?", (u, d)).fetchone()
+                prev, since, notified_at, notified_status = row or (None, now, None, None)
+                if st != prev:
+                    since = now
+                if not _notifiable(st):
+                    # not sent (e.g. sold out without ALWAYS_NOTIFY), but the next 'available' is news again
+                    notified_status = None
+                notify = (_notifiable(st) and st != notified_status
+                          and (notified_at is None or now - notified_at >= NOTIFY_COOLDOWN))
+                if notify:
+                    notified_at, notified_status = now, st
+                if row == (st, since, notified_at, notified_status):
+                    continue
+                self.db.execute(
+                    "INSERT INTO targets (url, date_text, status, since, notified_at, notified_status) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (url, date_text) DO UPDATE SET status = excluded.status, "
+                    "since = excluded.since, notified_at = excluded.notified_at, "
+                    "notified_status = excluded.notified_status",
+                    (u, d, st, since, notified_at, notified_status))
+                if notify:
+                    if st == prev:
+                        # held back by the cooldown: report the last known status before this one
+                        prev = (self.db.execute(
+                            "SELECT status FROM checks WHERE url = ? AND date_text = ? AND ts < ? AND status != ? "
+                            "AND status NOT LIKE 'unknown%' ORDER BY ts DESC LIMIT 1", (u, d, since, st)).fetchone()
+                            or (None,))[0]
+                    alerts.append((u, d, st, prev))
+            if STATE_KEEP_DAYS and now - self._pruned_at > 3600:
+                self.db.execute("DELETE FROM checks WHERE ts < ?", (now - STATE_KEEP_DAYS * 86400,))
+                self._pruned_at = now
+        return alerts
+
+    def history(self, url_like: str = "", date_text: str = "", limit: int = 20):
+        """(current rows, recent status changes) for targets matching the filters."""
+        where, args = "url LIKE ? AND (? = '' OR date_text = ?)", (f"%{url_like}%", date_text, date_text)
+        current = self.db.execute(
+            "SELECT t.url, t.date_text, t.status, t.since, c.n, c.last_ts, c.avg_ms FROM targets t JOIN "
+            "(SELECT url, date_text, COUNT(*) AS n, MAX(ts) AS last_ts, AVG(latency_ms) AS avg_ms FROM checks "
+            f"WHERE {where} GROUP BY url, date_text) c USING (url, date_text) ORDER BY t.url, t.date_text",
+            args).fetchall()
+        changes = self.db.execute(
+            "SELECT url, date_text, prev, status, ts FROM ("
+            "  SELECT url, date_text, status, ts, LAG(status) OVER (PARTITION BY url, date_text ORDER BY ts) AS prev"
+            f"  FROM checks WHERE {where} AND status NOT LIKE 'unknown%'"
+            ") WHERE prev IS NULL OR prev != status ORDER BY ts DESC LIMIT ?", (*args, limit)).fetchall()
+        return current, changes
+
+    def close(self):
+        self.db.close()
+
+def _fmt_ts(ts) -> str:
+    return datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%SZ") if ts else "-"
+
+def print_history(store: StateStore, url_like: str = "", date_text: str = "", limit: int = 20) -> None:
+    current, changes = store.history(url_like, date_text, limit)
+    if not current:
+        print("No checks recorded yet.")
+        return
+    print("Current status:")
+    for url, d, st, since, n, last_ts, avg_ms in current:
+        print(f"  {d:<24} {st or '-':<10} since {_fmt_ts(since)}  last check {_fmt_ts(last_ts)}  "
+              f"checks={n} avg={avg_ms or 0:.0f}ms  {url}")
+    print(f"Recent changes (newest first, up to {limit}):")
+    for url, d, prev, st, ts in changes:
+        print(f"  {_fmt_ts(ts)}  {d:<24} {prev or '(first seen)'} -> {st}  {url}")
+
+# -------- Report --------
+def report(notifier: Notifier, url: str, date_text: str, status: str, notify: bool, previous: str = None) -> None:
     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ")
-    print(f"[{now}] {DATE_TEXT}: {status}")
+    if LOG_FORMAT == "json":
+        _log_event("status", url=url, date=date_text, status=status, previous=previous, notify=notify)
+    else:
+        print(f"[{now}] {date_text}: {status}", flush=True)
+
+    if notify:
+        notifier.put({"url": url, "date": date_text, "status": status, "previous": previous, "utc": now})
+
+async def run(targets: dict, concurrency: int, daemon: bool, interval: float, jitter: float,
+              metrics_port: int = 0) -> None:
+    server = await asyncio.start_server(_serve_metrics, METRICS_HOST, metrics_port) if daemon and metrics_port else None
+    session = BrowserSession()
+    fetcher = HttpFetcher() if HTTP_FAST_PATH else None
+    store = StateStore(STATE_DB) if STATE_DB else None
+    notifier = Notifier(build_channels())
+    notifier.start()
+    artifacts = ArtifactStore()
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                results = await run_cycle(session, targets, concurrency, fetcher, artifacts)
+            except Exception as e:
+                if not daemon:
+                    raise
+                # e.g. the browser failed to (re)launch: drop it and retry next cycle
+                _log("warn", f"polling cycle failed ({type(e).__name__}: {e})")
+                await session.close_browser()
+                results = {}
+            if store:
+                alerts = {(u, d): prev for u, d, _, prev in store.record(results)}
+            else:
+                alerts = {key: None for key, (st, _) in results.items() if _notifiable(st)}
+            for (url, date_text), (status, _) in results.items():
+                report(notifier, url, date_text, status, (url, date_text) in alerts, alerts.get((url, date_text)))
+            if not daemon:
+                break
+            delay = interval * (1 + random.uniform(-jitter, jitter)) - (time.monotonic() - started)
+            await asyncio.sleep(max(delay, 1.0))
+    finally:
+        if server:
+            server.close()
+        await artifacts.drain()
+        await notifier.close()
+        if store:
+            store.close()
+        if fetcher:
+            await fetcher.aclose()
+        await session.close()
 
-    if status == "available" or (ALWAYS_NOTIFY and status != "unknown"):
-        subject = f"NT tickets {status.upper()}: {DATE_TEXT}"
-        body = f"Status: {status}\nURL: {TARGET_URL}\nUTC: {now}\n"
-        send_email(subject, body)
+# -------- Main --------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Watch National Theatre event pages for dates becoming bookable.")
+    ap.add_argument("--config", default=WATCH_CONFIG, help="watch list file (.json/.toml/.yaml) with many URLs/dates")
+    ap.add_argument("--concurrency", type=int, help="max pages checked at once (overrides the config file)")
+    ap.add_argument("--daemon", action="store_true", help="keep one browser alive and check repeatedly")
+    ap.add_argument("--interval", type=float, default=CHECK_INTERVAL, help="seconds between checks in daemon mode")
+    ap.add_argument("--jitter", type=float, default=CHECK_JITTER, help="random +/- fraction applied to --interval")
+    ap.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                    help="daemon mode: serve Prometheus metrics on this port (0 = off)")
+    ap.add_argument("--history", action="store_true", help="print availability history from STATE_DB and exit")
+    ap.add_argument("--target", default="", help="with --history: only URLs containing this text")
+    ap.add_argument("--date", default="", help="with --history: only this date text")
+    ap.add_argument("--limit", type=int, default=20, help="with --history: number of status changes to show")
+    args = ap.parse_args(argv)
+
+    if args.history:
+        if not STATE_DB or not Path(STATE_DB).exists():
+            raise SystemExit(f"[ERROR] no state database at {STATE_DB!r}")
+        store = StateStore(STATE_DB)
+        try:
+            print_history(store, args.target, args.date, args.limit)
+        finally:
+            store.close()
+        return
+
+    targets, concurrency = load_targets(args.config)
+    if args.concurrency:
+        concurrency = args.concurrency
+    try:
+        asyncio.run(run(targets, concurrency, args.daemon, args.interval, args.jitter, args.metrics_port))
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
     main()
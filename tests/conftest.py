@@ -0,0 +1,17 @@
+# Shared test setup: monitor.py/bench.py live at the repo root; fixtures/ is served by bench's local server.
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import bench  # noqa: E402
+
+FIXTURES = bench.FIXTURES
+
+@pytest.fixture(scope="module")
+def base_url():
+    server, base = bench._serve(FIXTURES)
+    yield base
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,79 @@
+# Tests for ArtifactStore bounds (no Chromium needed): a stub page stands in for Playwright's.
+import asyncio, json, os
+
+import pytest
+
+import monitor
+
+class _Page:
+    def __init__(self, html="<html><body>Sat 16 August 2025</body></html>"):
+        self.html, self.closed, self.scroll_y, self.shot_at = html, False, 4000, None
+
+    async def content(self):
+        return self.html
+
+    async def evaluate(self, script):
+        if script == "window.scrollTo(0, 0)":
+            self.scroll_y = 0
+
+    async def screenshot(self, **opts):
+        self.shot_at = self.scroll_y
+        return b"\xff\xd8image"
+
+    async def close(self):
+        self.closed = True
+
+@pytest.fixture(autouse=True)
+def _settings(monkeypatch):
+    monkeypatch.setattr(monitor, "ARTIFACT_MIN_INTERVAL", 900)
+    monkeypatch.setattr(monitor, "ARTIFACT_SCREENSHOT", "viewport")
+    monkeypatch.setattr(monitor, "ARTIFACT_IMAGE_FORMAT", "jpeg")
+
+def _capture(root, url, page=None, tag="unknown_status"):
+    """Capture with a fresh store (like a one-shot run); returns whether it was accepted."""
+    async def go():
+        store = monitor.ArtifactStore(root)
+        accepted = store.capture(page or _Page(), url, tag)
+        await store.drain()
+        return accepted
+    return asyncio.run(go())
+
+def _age(root, seconds):
+    for p in root.iterdir():
+        t = p.stat().st_mtime - seconds
+        os.utime(p, (t, t))
+
+def test_rate_limit_holds_across_runs_per_url(tmp_path):
+    assert _capture(tmp_path, "https://a.example/show")
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".gz", ".jpg"]
+    assert not _capture(tmp_path, "https://a.example/show")
+    assert _capture(tmp_path, "https://b.example/show")
+    assert _capture(tmp_path, "https://a.example/show", tag="date_region_not_found")
+    _age(tmp_path, 1000)
+    assert _capture(tmp_path, "https://a.example/show")
+
+def test_duplicate_page_refreshes_html_and_screenshot(tmp_path):
+    page = _Page()
+    assert _capture(tmp_path, "https://a.example/show", page)
+    assert page.closed
+    _age(tmp_path, 1000)
+    before = {p.name for p in tmp_path.iterdir()}
+    assert _capture(tmp_path, "https://a.example/show")
+    assert {p.name for p in tmp_path.iterdir()} == before
+    assert all(p.stat().st_mtime > monitor.time.time() - 60 for p in tmp_path.iterdir())
+
+def test_capture_failure_logs_json_warning(tmp_path, monkeypatch, capsys):
+    class Broken(_Page):
+        async def content(self):
+            raise RuntimeError("page crashed")
+    monkeypatch.setattr(monitor, "LOG_FORMAT", "json")
+    page = Broken()
+    assert _capture(tmp_path, "https://a.example/show", page)
+    event = json.loads(capsys.readouterr().out)
+    assert event["event"] == "warn" and event["url"] == "https://a.example/show"
+    assert "page crashed" in event["message"] and page.closed
+
+def test_viewport_screenshot_is_taken_from_the_top(tmp_path):
+    page = _Page()
+    assert _capture(tmp_path, "https://a.example/show", page)
+    assert page.shot_at == 0
@@ -0,0 +1,11 @@
+# Tests for bench.py helpers.
+import pytest
+
+import bench
+
+@pytest.mark.parametrize("pct, expected", [(50, 5), (90, 9), (99, 10), (100, 10), (1, 1)])
+def test_percentile_nearest_rank(pct, expected):
+    assert bench._percentile(list(range(10, 0, -1)), pct) == expected
+
+def test_percentile_single_value():
+    assert bench._percentile([42], 50) == bench._percentile([42], 99) == 42
@@ -0,0 +1,54 @@
+# Tests for run_cycle's failure handling (no Chromium needed): stub browser objects stand in for Playwright's.
+import asyncio, time
+
+import monitor
+
+DATES = ["Sat 16 August 2025"]
+
+class _Browser:
+    def __init__(self):
+        self.closed = False
+
+    def is_connected(self):
+        return True
+
+    async def close(self):
+        self.closed = True
+
+class _HungContext:
+    async def new_page(self):
+        raise TimeoutError("renderer not responding")
+
+class _WedgedContext:
+    async def new_page(self):
+        await asyncio.Event().wait()     # no timeout of its own: only the check deadline ends it
+
+class _Session(monitor.BrowserSession):
+    """Launches a stub browser that stays connected but whose pages never open."""
+    def __init__(self, ctx=_HungContext):
+        super().__init__()
+        self.launches, self._ctx = [], ctx
+
+    async def _launch(self):
+        self.browser, self.ctx = _Browser(), self._ctx()
+        self.launches.append(self.browser)
+
+def test_hung_browser_is_dropped_when_every_check_fails():
+    async def go():
+        session = _Session()
+        targets = {"https://a.example/show": DATES, "https://b.example/show": DATES}
+        first = await monitor.run_cycle(session, targets, 2)
+        dropped = session.browser is None and session.launches[0].closed
+        await monitor.run_cycle(session, targets, 2)
+        return first, dropped, len(session.launches)
+    first, dropped, launches = asyncio.run(go())
+    assert {st for st, _ in first.values()} == {"unknown: check failed"}
+    assert dropped and launches == 2
+
+def test_wedged_browser_call_is_cut_off_by_the_check_deadline(monkeypatch):
+    monkeypatch.setattr(monitor, "CHECK_BUDGET", 0.2)
+    monkeypatch.setattr(monitor, "_CHECK_GRACE", 0.1)
+    started = time.monotonic()
+    got = asyncio.run(monitor.run_cycle(_Session(_WedgedContext), {"https://a.example/show": DATES}, 1))
+    assert time.monotonic() - started < 2
+    assert [st for st, _ in got.values()] == ["unknown: check failed"]
@@ -0,0 +1,38 @@
+# Tests for _decide's fallback to the locator path (no Chromium needed): region lookups are stubbed.
+import asyncio
+
+import monitor
+
+class _Region:
+    def __init__(self, text):
+        self.first = self
+        self.text = text
+
+    async def inner_text(self, timeout=None):
+        return self.text
+
+def _stub_locators(monkeypatch, regions):
+    async def find(page, date_text):
+        return regions.get(date_text)
+    async def status(region):
+        return "available" if "Book" in region.text else "sold out"
+    monkeypatch.setattr(monitor, "_find_date_region", find)
+    monkeypatch.setattr(monitor, "_status_from_region", status)
+
+def test_locator_fallback_records_matched_text(monkeypatch):
+    monkeypatch.setattr(monitor, "IN_PAGE_EVAL", False)
+    _stub_locators(monkeypatch, {"Sat 16 August 2025": _Region("Sat 16 August 2025\n  7:30pm   Book tickets")})
+    matched = {}
+    got = asyncio.run(monitor._decide(object(), ["Sat 16 August 2025", "Sun 17 August 2025"], matched))
+    assert got == {"Sat 16 August 2025": "available", "Sun 17 August 2025": "unknown: date region not found"}
+    assert matched == {"Sat 16 August 2025": "Sat 16 August 2025 7:30pm Book tickets"}
+
+def test_failed_in_page_evaluation_falls_back_with_matched_text(monkeypatch):
+    async def broken(page, dates):
+        raise RuntimeError("Execution context was destroyed")
+    monkeypatch.setattr(monitor, "IN_PAGE_EVAL", True)
+    monkeypatch.setattr(monitor, "_evaluate_dates", broken)
+    _stub_locators(monkeypatch, {"Sat 16 August 2025": _Region("Sat 16 August 2025 Sold out")})
+    matched = {}
+    assert asyncio.run(monitor._decide(object(), ["Sat 16 August 2025"], matched)) == {"Sat 16 August 2025": "sold out"}
+    assert matched == {"Sat 16 August 2025": "Sat 16 August 2025 Sold out"}
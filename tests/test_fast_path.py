@@ -0,0 +1,109 @@
+# Tests for the HTTP fast path (no Chromium needed): fixtures/ is served by a local http.server (conftest).
+import asyncio, json
+
+import pytest
+
+import bench
+import monitor
+
+FIXTURES = bench.FIXTURES
+MANIFEST = bench._manifest(FIXTURES)
+
+def _fast_path(url, dates):
+    async def go():
+        fetcher = monitor.HttpFetcher()
+        try:
+            return await monitor.http_statuses(fetcher, url, dates)
+        finally:
+            await fetcher.aclose()
+    return asyncio.run(go())
+
+# -------- _html_statuses --------
+def test_html_statuses_sold_out_page():
+    html = (FIXTURES / "sold_out.html").read_text(encoding="utf-8")
+    assert monitor._html_statuses(html, ["Sat 16 August 2025", "Sun 17 August 2025", "Mon 18 August 2025"]) == {
+        "Sat 16 August 2025": "sold out", "Sun 17 August 2025": "sold out", "Mon 18 August 2025": "unknown"}
+
+def test_html_statuses_any_book_button_means_available():
+    html = (FIXTURES / "available.html").read_text(encoding="utf-8")
+    assert monitor._html_statuses(html, ["Sat 16 August 2025", "Sun 17 August 2025", "Fri 15 August 2025"]) == {
+        "Sat 16 August 2025": "available", "Sun 17 August 2025": "unknown", "Fri 15 August 2025": "sold out"}
+
+def test_html_statuses_hidden_book_link_next_to_sold_out_is_left_to_browser():
+    html = (FIXTURES / "text_layout.html").read_text(encoding="utf-8")
+    assert monitor._html_statuses(html, ["Saturday 16 August 2025", "Sunday 17 August 2025"]) == {
+        "Saturday 16 August 2025": "unknown", "Sunday 17 August 2025": "available"}
+
+def test_html_statuses_day_does_not_match_inside_longer_day():
+    html = (FIXTURES / "available.html").read_text(encoding="utf-8")
+    assert monitor._html_statuses(html, ["Wed 6 August 2025"]) == {"Wed 6 August 2025": "unknown"}
+
+# -------- _json_verdict / _json_statuses --------
+@pytest.mark.parametrize("value, expected", [
+    ("available", "available"),
+    ("ON_SALE", "available"),
+    ("SOLD_OUT", "sold out"),
+    ("Sold out", "sold out"),
+    ("Not available", "sold out"),
+    ("NotOnSale", "sold out"),
+    ("bookingClosed", "sold out"),
+    ("NOT_BOOKABLE", "sold out"),
+    ("unavailable", "sold out"),
+    ("Limited availability", ""),
+    ("on hold", ""),
+])
+def test_json_verdict_string_status(value, expected):
+    assert monitor._json_verdict({"status": value}) == expected
+
+def test_json_verdict_boolean_flags():
+    assert monitor._json_verdict({"soldOut": False}) == "available"
+    assert monitor._json_verdict({"is_sold_out": True}) == "sold out"
+    assert monitor._json_verdict({"onSale": False}) == "sold out"
+    assert monitor._json_verdict({"date": "2025-08-16"}) == ""
+
+def test_json_statuses_votes_and_date_anchoring():
+    data = json.loads((FIXTURES / "api" / "performances.json").read_text(encoding="utf-8"))
+    dates = ["Fri 15 August 2025", "Sat 16 August 2025", "Sun 17 August 2025",
+             "Mon 18 August 2025", "Wed 6 August 2025", "Thu 7 August 2025"]
+    assert monitor._json_statuses(data, dates) == {
+        "Fri 15 August 2025": "sold out",
+        "Sat 16 August 2025": "available",     # one of two performances still on sale
+        "Sun 17 August 2025": "sold out",
+        "Mon 18 August 2025": "unknown",       # unclear status string -> browser decides
+        "Wed 6 August 2025": "sold out",       # only its own entry, not 16 August's
+        "Thu 7 August 2025": "unknown",
+    }
+
+def test_json_statuses_text_dates_do_not_match_longer_day():
+    data = [{"date": "16 August 2025", "status": "available"}]
+    assert monitor._json_statuses(data, ["Wed 6 August 2025"]) == {"Wed 6 August 2025": "unknown"}
+
+# -------- http_statuses against the local server --------
+@pytest.mark.parametrize("name", sorted(MANIFEST))
+def test_http_statuses_never_contradicts_manifest(base_url, name):
+    expected = MANIFEST[name]
+    got = _fast_path(base_url + name, list(expected))
+    for d, st in got.items():
+        assert st in ("available", "sold out")
+        assert st == expected[d], d
+
+def test_http_statuses_uses_json_endpoint_and_skips_template_urls(base_url):
+    got = _fast_path(base_url + "js_app.html", ["Sat 16 August 2025", "Sun 17 August 2025", "Mon 18 August 2025"])
+    assert got == {"Sat 16 August 2025": "available", "Sun 17 August 2025": "sold out"}
+
+def test_http_statuses_unreachable_or_invalid_url_returns_nothing(base_url):
+    assert _fast_path(base_url + "missing.html", ["Sat 16 August 2025"]) == {}
+    assert _fast_path("http://[${api}]/performances", ["Sat 16 August 2025"]) == {}
+
+def test_conditional_get_reuses_cached_body(base_url):
+    async def go():
+        fetcher = monitor.HttpFetcher()
+        try:
+            first = await monitor.http_statuses(fetcher, base_url + "sold_out.html", ["Sat 16 August 2025"])
+            assert base_url + "sold_out.html" in fetcher._cache    # Last-Modified remembered
+            second = await monitor.http_statuses(fetcher, base_url + "sold_out.html", ["Sat 16 August 2025"])
+            return first, second
+        finally:
+            await fetcher.aclose()
+    first, second = asyncio.run(go())
+    assert first == second == {"Sat 16 August 2025": "sold out"}
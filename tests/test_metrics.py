@@ -0,0 +1,87 @@
+# Tests for per-check instrumentation (no Chromium needed): stubs stand in for Playwright objects.
+import asyncio
+
+import monitor
+
+def test_driver_task_does_not_inherit_the_launching_check_counter(monkeypatch):
+    seen = []
+
+    class _Playwright:
+        def __init__(self):
+            self.chromium = self
+
+        async def start(self):
+            async def reader():     # like Playwright's Connection.run: the task that runs route handlers
+                seen.append(monitor._PW_CALLS.get())
+            await asyncio.create_task(reader())
+            return self
+
+        async def launch(self, **kwargs):
+            return self
+
+        async def new_context(self):
+            return None
+
+    monkeypatch.setattr(monitor, "async_playwright", _Playwright)
+
+    async def go():
+        box = [0]
+        monitor._PW_CALLS.set(box)
+        await monitor.BrowserSession()._launch()
+        return monitor._PW_CALLS.get() is box
+    assert asyncio.run(go())
+    assert seen == [None]
+
+class _Request:
+    def __init__(self, url, resource_type):
+        self.url, self.resource_type = url, resource_type
+
+    def is_navigation_request(self):
+        return self.resource_type == "document"
+
+class _Route:
+    def __init__(self, request, log):
+        self.request, self.log = request, log
+
+    async def continue_(self):
+        self.log.append(("continue", self.request.url))
+
+    async def abort(self, error_code=None):
+        self.log.append(("abort", self.request.url))
+
+class _Page:
+    def __init__(self):
+        self.handler = None
+
+    def on(self, event, fn):
+        pass
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+def test_route_calls_count_into_the_check_that_owns_the_page(monkeypatch):
+    monkeypatch.setattr(monitor, "BLOCK_RESOURCES", True)
+    page, stats, log = _Page(), {}, []
+
+    async def go():
+        box = [0]
+        monitor._PW_CALLS.set(box)
+        await monitor._watch_network(page, "https://example.org/show", stats)
+        monitor._PW_CALLS.set(None)     # handlers run in the driver's task, where no counter is set
+        for url, kind in (("https://example.org/show", "document"), ("https://example.org/app.js", "script"),
+                          ("https://example.org/hero.jpg", "image"), ("https://www.google-analytics.com/g", "xhr")):
+            await page.handler(_Route(_Request(url, kind), log))
+        return box[0]
+    assert asyncio.run(go()) == 4
+    assert [verb for verb, _ in log] == ["continue", "continue", "abort", "abort"]
+    assert stats["blocked_by"] == {"image": 1, "domain": 1}
+
+def test_render_keeps_full_precision_and_escapes_labels():
+    m = monitor.Metrics()
+    m.inc("nt_page_bytes_total", 104857601)
+    m.set("nt_rss_bytes", 123456789.5)
+    m.inc("nt_checks_total", url='https://x.org/?q="a"\\b\nc')
+    lines = m.render().splitlines()
+    assert "nt_page_bytes_total 104857601.0" in lines
+    assert "nt_rss_bytes 123456789.5" in lines
+    assert 'nt_checks_total{url="https://x.org/?q=\\"a\\"\\\\b\\nc"} 1.0' in lines
@@ -0,0 +1,33 @@
+# Tests for URL cleaning and resource-blocking helpers.
+import pytest
+
+import monitor
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://x.org/e?a=1;b=2", "https://x.org/e?a=1;b=2"),
+    ("https://x.org/e?foo", "https://x.org/e?foo"),
+    ("https://x.org/e?q=a%20b&r=c+d", "https://x.org/e?q=a%20b&r=c+d"),
+    ("https://x.org/e?utm_source=mail&q=a%20b&_gl=1*abc*_gcl_au*xyz&foo", "https://x.org/e?q=a%20b&foo"),
+    ("https://x.org/e?gclid=1&utm_medium=cpc", "https://x.org/e"),
+    ("https://x.org/e?utm%5Fsource=1&a=1", "https://x.org/e?a=1"),
+    ("https://x.org/e?a=1#_gl=1*x", "https://x.org/e?a=1"),
+    ("https://x.org/e?a=1#section", "https://x.org/e?a=1#section"),
+])
+def test_clean_url_strips_only_tracking_params(url, expected):
+    assert monitor._clean_url(url) == expected
+
+@pytest.mark.parametrize("host, expected", [
+    ("events.nationaltheatre.org.uk", "nationaltheatre.org.uk"),
+    ("cdn.example.com", "example.com"),
+    ("127.0.0.1", "127.0.0.1"),
+    ("10.0.0.1", "10.0.0.1"),
+    ("::1", "::1"),
+])
+def test_site(host, expected):
+    assert monitor._site(host) == expected
+
+def test_third_party_script_check_keeps_ip_hosts_apart(monkeypatch):
+    monkeypatch.setattr(monitor, "BLOCK_THIRD_PARTY_JS", True)
+    page_site = monitor._site("127.0.0.1")
+    assert monitor._block_reason("script", "10.0.0.1", page_site) == "third-party script"
+    assert monitor._block_reason("script", "127.0.0.1", page_site) == ""
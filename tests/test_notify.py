@@ -0,0 +1,127 @@
+# Tests for the Notifier: digests, retries, per-channel isolation; email against a local SMTP stand-in.
+import asyncio, os, socketserver, threading, time
+
+import pytest
+
+import monitor
+
+def _alert(date, status="available"):
+    return {"url": "https://example.org/show", "date": date, "status": status, "previous": None,
+            "utc": "2025-08-01 10:00:00Z"}
+
+class _Channel:
+    def __init__(self, name="stub", failures=0):
+        self.name, self.failures, self.sent = name, failures, []
+
+    async def send(self, subject, body, alerts):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("unreachable")
+        self.sent.append((subject, [a["date"] for a in alerts], time.monotonic()))
+
+    async def close(self):
+        pass
+
+@pytest.fixture(autouse=True)
+def _fast(monkeypatch):
+    monkeypatch.setattr(monitor, "NOTIFY_BATCH_WINDOW", 0.2)
+    monkeypatch.setattr(monitor, "NOTIFY_RETRIES", 2)
+    monkeypatch.setattr(monitor.random, "uniform", lambda a, b: 0.1)    # backoff 0.1s, 0.2s, ...
+
+def _notify(channels, batches, gap=0.0):
+    """Put each batch of alerts (gap seconds apart), close the notifier; returns the start time."""
+    async def go():
+        n = monitor.Notifier(channels)
+        n.start()
+        started = time.monotonic()
+        for i, batch in enumerate(batches):
+            if i:
+                await asyncio.sleep(gap)
+            for a in batch:
+                n.put(a)
+        await n.close()
+        return started
+    return asyncio.run(go())
+
+def test_alerts_within_the_window_form_one_digest():
+    ch = _Channel()
+    _notify([ch], [[_alert("Sat 16 August 2025"), _alert("Sun 17 August 2025", "sold out")],
+                   [_alert("Mon 18 August 2025")], [_alert("Tue 19 August 2025")]], gap=0.5)
+    assert [(subject, dates) for subject, dates, _ in ch.sent] == [
+        ("NT tickets: 2 updates (1 available)", ["Sat 16 August 2025", "Sun 17 August 2025"]),
+        ("NT tickets AVAILABLE: Mon 18 August 2025", ["Mon 18 August 2025"]),
+        ("NT tickets AVAILABLE: Tue 19 August 2025", ["Tue 19 August 2025"])]
+
+def test_retry_then_give_up(capsys):
+    flaky, dead = _Channel("flaky", failures=2), _Channel("dead", failures=99)
+    _notify([flaky, dead], [[_alert("Sat 16 August 2025")]])
+    assert [dates for _, dates, _ in flaky.sent] == [["Sat 16 August 2025"]]
+    assert dead.sent == [] and dead.failures == 99 - 3      # first try + NOTIFY_RETRIES
+    out = capsys.readouterr().out
+    assert "dead notification failed, giving up" in out and "flaky notification failed, giving up" not in out
+
+def test_failing_channel_does_not_delay_the_others(monkeypatch):
+    monkeypatch.setattr(monitor, "NOTIFY_RETRIES", 1)
+    monkeypatch.setattr(monitor.random, "uniform", lambda a, b: 1.0)    # dead channel backs off 1 s per digest
+    ok, dead = _Channel("ok"), _Channel("dead", failures=99)
+    started = _notify([dead, ok], [[_alert("Sat 16 August 2025")], [_alert("Sun 17 August 2025")]], gap=0.4)
+    assert [dates for _, dates, _ in ok.sent] == [["Sat 16 August 2025"], ["Sun 17 August 2025"]]
+    assert ok.sent[1][2] - started < 1.0
+
+def test_command_killed_on_timeout(tmp_path, monkeypatch):
+    pid_file = tmp_path / "pid"
+    monkeypatch.setattr(monitor, "NOTIFY_COMMAND", f"echo $$ > {pid_file}; exec sleep 30")
+    ch = monitor.CommandChannel()
+    ch.timeout = 0.5
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ch.send("subject", "body", []))
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+# -------- Email against a local SMTP stand-in --------
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 localhost ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode().strip().upper()
+            if cmd.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif cmd == "DATA":
+                self.wfile.write(b"354 end with .\r\n")
+                data = []
+                for raw in iter(self.rfile.readline, b""):
+                    if raw in (b".\r\n", b".\n"):
+                        break
+                    data.append(raw)
+                self.server.messages.append(b"".join(data).decode())
+                self.wfile.write(b"250 queued\r\n")
+            elif cmd == "QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:   # MAIL, RCPT, NOOP, RSET
+                self.wfile.write(b"250 ok\r\n")
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections, server.messages = 0, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for name, value in (("SMTP_HOST", "127.0.0.1"), ("SMTP_PORT", server.server_address[1]),
+                        ("SMTP_STARTTLS", False), ("SMTP_USER", ""), ("SMTP_PASS", ""),
+                        ("EMAIL_FROM", "watcher@example.org"), ("EMAIL_TO", "me@example.org")):
+        monkeypatch.setattr(monitor, name, value)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_email_reuses_one_smtp_connection(smtp_server):
+    ch = monitor.EmailChannel()
+    _notify([ch], [[_alert("Sat 16 August 2025")], [_alert("Sun 17 August 2025", "sold out")]], gap=0.4)
+    assert smtp_server.connections == 1
+    assert len(smtp_server.messages) == 2
+    assert "Subject: NT tickets SOLD OUT: Sun 17 August 2025" in smtp_server.messages[1]
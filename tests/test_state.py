@@ -0,0 +1,44 @@
+# Tests for StateStore de-duplication: alerts on status changes, delayed (not dropped) by NOTIFY_COOLDOWN.
+import pytest
+
+import monitor
+
+KEY = ("https://example.org/show", "Sat 16 August 2025")
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitor, "NOTIFY_COOLDOWN", 900)
+    monkeypatch.setattr(monitor, "ALWAYS_NOTIFY", False)
+    s = monitor.StateStore(str(tmp_path / "state.db"))
+    yield s
+    s.close()
+
+def _run(store, sequence):
+    """{t: [status alerted]} for a list of (t, status) cycles of the one target."""
+    return {t: [a[2] for a in store.record({KEY: (st, 10)}, now=t)] for t, st in sequence}
+
+def test_alerts_on_change_only(store):
+    assert _run(store, [(1000, "sold out"), (1100, "available"), (1200, "available"), (1300, "unknown: timeout")]) == {
+        1000: [], 1100: ["available"], 1200: [], 1300: []}
+
+def test_cooldown_delays_alert_instead_of_dropping_it(store):
+    got = _run(store, [(1100, "available"), (1200, "sold out"), (1300, "available"), (1900, "available"),
+                       (2000, "available"), (5000, "available")])
+    assert got == {1100: ["available"], 1200: [], 1300: [], 1900: [], 2000: ["available"], 5000: []}
+
+def test_delayed_alert_reports_previous_status(store):
+    store.record({KEY: ("available", 10)}, now=1100)
+    store.record({KEY: ("sold out", 10)}, now=1200)
+    store.record({KEY: ("available", 10)}, now=1300)
+    assert store.record({KEY: ("available", 10)}, now=2000) == [(*KEY, "available", "sold out")]
+
+def test_pending_alert_dropped_when_status_reverts(store):
+    got = _run(store, [(1100, "available"), (1200, "sold out"), (1300, "available"), (1400, "sold out"),
+                       (2000, "sold out")])
+    assert got == {1100: ["available"], 1200: [], 1300: [], 1400: [], 2000: []}
+
+def test_always_notify_skips_return_to_notified_status(store, monkeypatch):
+    monkeypatch.setattr(monitor, "ALWAYS_NOTIFY", True)
+    got = _run(store, [(1000, "available"), (1200, "sold out"), (1300, "available"), (2000, "available"),
+                       (2100, "sold out")])
+    assert got == {1000: ["available"], 1200: [], 1300: [], 2000: [], 2100: ["sold out"]}